@@ -1,3 +1,4 @@
+import atexit
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -10,6 +11,7 @@ from data_simulator import NetworkDataSimulator
 from anomaly_detector import AnomalyDetector
 from real_network_collector import RealNetworkCollector
 from dashboard_clean import Dashboard
+from storage_sinks import create_sink
 
 def main():
     st.set_page_config(
@@ -67,6 +69,8 @@ def main():
     
     if 'collector' not in st.session_state:
         st.session_state.collector = RealNetworkCollector()
+        # Stop the backup schedule and flush queued writes when the server exits
+        atexit.register(st.session_state.collector.close)
     
     if 'detector' not in st.session_state:
         st.session_state.detector = AnomalyDetector()
@@ -126,6 +130,16 @@ def main():
                     )
                     st.session_state.model_trained = False
                 st.success("Simulated data generated successfully")
+            
+            if st.button("Write to Database", key="write_db_button"):
+                with st.spinner("Writing simulated traffic to the database..."):
+                    result = st.session_state.simulator.write_to_storage(
+                        create_sink(st.session_state.collector.db_manager),
+                        num_devices=num_devices,
+                        hours=hours_of_data,
+                        anomaly_percentage=anomaly_rate
+                    )
+                st.success(f"{result['rows']:,} rows written ({result['rows_per_sec']:,} rows/s)")
         else: # Real Network Scan
             st.markdown("##### Real Scan Settings")
             scan_ports = st.text_input("Ports to scan", "1-1000", key="scan_ports_input")
@@ -175,6 +189,12 @@ def main():
             if not st.session_state.anomalies_detected.empty:
                 anomaly_count = len(st.session_state.anomalies_detected)
                 detection_progress.warning(f"⚠️ {anomaly_count} anomalies detected!")
+                
+                # Persistance en masse: toutes les anomalies, une alerte pour les plus graves
+                db_manager = st.session_state.collector.db_manager
+                db_manager.insert_anomalies(st.session_state.anomalies_detected)
+                severe = st.session_state.anomalies_detected['severity'].isin(['Critique', 'Élevé'])
+                db_manager.create_alerts(st.session_state.anomalies_detected[severe])
             else:
                 detection_progress.success("No anomalies detected")
     
@@ -192,10 +212,19 @@ def main():
 
 def render_dashboard_section():
     """Main dashboard section"""
+    # Long ranges come from the database summaries (minute or hourly tier)
+    timeline_days = st.selectbox("Timeline range", [0, 1, 7, 30, 90, 365], key="timeline_range",
+                                 format_func=lambda days: "Session data" if days == 0 else f"Last {days} days")
+    timeline_data = None
+    if timeline_days:
+        timeline_data = st.session_state.collector.db_manager.get_traffic_timeline(
+            datetime.now() - timedelta(days=timeline_days))
+    
     st.session_state.dashboard.render_dashboard(
         st.session_state.network_data,
         st.session_state.anomalies_detected,
-        st.session_state.model_trained
+        st.session_state.model_trained,
+        timeline_data=timeline_data
     )
 
 def render_network_analysis_section():
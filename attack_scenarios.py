@@ -0,0 +1,267 @@
+"""
+Bibliothèque de scénarios d'attaque multi-étapes et constructeur de corpus de benchmark
+Produit des jeux de données étiquetés, figés par une graine, servant de charge de
+référence pour mesurer le débit et la précision du détecteur d'anomalies.
+"""
+
+import time
+import random
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from data_simulator import NetworkDataSimulator
+from baseline_enricher import DeviceBaselineEnricher
+from columnar_store import write_columns, read_columns
+
+class AttackScenarioLibrary:
+    """Scénarios d'attaque générant des séquences d'événements corrélés dans le temps"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.scenarios = {
+            'slow_exfiltration': self.slow_exfiltration,
+            'c2_beaconing': self.c2_beaconing,
+            'lateral_movement': self.lateral_movement,
+            'off_hours_burst': self.off_hours_burst
+        }
+
+    def _events(self, profile, timestamps, ports, protocols, volumes, scenario, step=None):
+        """Construit le DataFrame d'événements d'un scénario pour un appareil"""
+        count = len(timestamps)
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'device_id': profile['device_id'],
+            'mac_address': profile['mac_address'],
+            'ip_address': profile['ip_address'],
+            'device_type': profile['device_type'],
+            'port': np.broadcast_to(ports, count).astype(np.int64),
+            'protocol': np.broadcast_to(np.asarray(protocols, dtype=object), count),
+            'data_volume_mb': np.broadcast_to(volumes, count).astype(float),
+            'is_anomaly': True,
+            'anomaly_type': scenario,
+            'scenario_step': np.broadcast_to(np.asarray(step or scenario, dtype=object), count)
+        })
+
+    def slow_exfiltration(self, profiles, start, end):
+        """
+        Exfiltration lente: un appareil envoie régulièrement des volumes modestes,
+        chacun dans sa plage normale, vers un même service (HTTPS ou tunnel DNS)
+        pendant plusieurs heures
+        """
+        profile = profiles[self.rng.integers(len(profiles))]
+        duration = min(end - start, timedelta(hours=int(self.rng.integers(6, 49))))
+        begin = start + (end - start - duration) * self.rng.random()
+
+        count = max(int(duration.total_seconds() // 900), 1)
+        offsets = np.sort(self.rng.uniform(0, duration.total_seconds(), count))
+        timestamps = pd.Timestamp(begin) + pd.to_timedelta(offsets, unit='s')
+
+        port, protocol = (443, 'TCP') if self.rng.random() < 0.7 else (53, 'UDP')
+        _, max_volume = profile['data_volume_range']
+        volumes = self.rng.uniform(0.3, 0.6, count) * max_volume
+
+        return [self._events(profile, timestamps, port, protocol, volumes, 'slow_exfiltration')]
+
+    def c2_beaconing(self, profiles, start, end):
+        """
+        Balise C2: connexions périodiques de très faible volume vers un port fixe,
+        avec une gigue de quelques pourcents autour de la période
+        """
+        profile = profiles[self.rng.integers(len(profiles))]
+        period = float(self.rng.choice([60, 120, 300, 600]))
+        duration = min(end - start, timedelta(hours=int(self.rng.integers(4, 25))))
+        begin = start + (end - start - duration) * self.rng.random()
+
+        count = max(int(duration.total_seconds() // period), 1)
+        offsets = np.arange(count) * period + self.rng.normal(0, period * 0.03, count)
+        timestamps = pd.Timestamp(begin) + pd.to_timedelta(np.maximum(offsets, 0), unit='s')
+
+        port = int(self.rng.choice([443, 4444, 8080, 8443]))
+        volumes = self.rng.uniform(0.001, 0.01, count)
+
+        return [self._events(profile, timestamps, port, 'TCP', volumes, 'c2_beaconing')]
+
+    def lateral_movement(self, profiles, start, end):
+        """
+        Mouvement latéral: reconnaissance SMB/RPC depuis un premier poste, accès
+        distant, puis rebonds successifs vers d'autres appareils qui répètent le balayage
+        """
+        chain_length = int(min(len(profiles), self.rng.integers(2, 5)))
+        chain = [profiles[i] for i in self.rng.choice(len(profiles), chain_length, replace=False)]
+        begin = pd.Timestamp(start + (end - start) * self.rng.random() * 0.8)
+
+        frames = []
+        for hop, profile in enumerate(chain):
+            # Balayage des hôtes internes sur les ports d'administration
+            sweep = int(self.rng.integers(20, 80))
+            offsets = np.sort(self.rng.uniform(0, 300, sweep))
+            ports = self.rng.choice([445, 135, 139, 5985], sweep)
+            frames.append(self._events(profile, begin + pd.to_timedelta(offsets, unit='s'), ports, 'TCP',
+                                       self.rng.uniform(0.001, 0.05, sweep), 'lateral_movement',
+                                       step=f"sweep_{hop}"))
+
+            # Connexions d'administration à distance vers les cibles trouvées
+            sessions = int(self.rng.integers(2, 6))
+            offsets = 300 + np.sort(self.rng.uniform(0, 900, sessions))
+            ports = self.rng.choice([3389, 22, 5985], sessions)
+            frames.append(self._events(profile, begin + pd.to_timedelta(offsets, unit='s'), ports, 'TCP',
+                                       self.rng.uniform(5, 50, sessions), 'lateral_movement',
+                                       step=f"remote_access_{hop}"))
+
+            begin += pd.Timedelta(minutes=int(self.rng.integers(20, 120)))
+
+        return frames
+
+    def off_hours_burst(self, profiles, start, end):
+        """
+        Rafale hors horaires: un appareil à horaires limités transfère de gros
+        volumes pendant la nuit
+        """
+        candidates = [p for p in profiles if p['activity_hours'] != (0, 24)] or profiles
+        profile = candidates[self.rng.integers(len(candidates))]
+
+        first_night = pd.Timestamp(start).normalize() + pd.Timedelta(hours=2)
+        nights = max((pd.Timestamp(end) - first_night).days, 1)
+        begin = first_night + pd.Timedelta(days=int(self.rng.integers(nights)))
+        begin = min(max(begin, pd.Timestamp(start)), pd.Timestamp(end))
+
+        count = int(self.rng.integers(20, 61))
+        offsets = np.sort(self.rng.uniform(0, 2 * 3600, count))
+        _, max_volume = profile['data_volume_range']
+        ports = self.rng.choice(profile['ports_preference'], count)
+
+        return [self._events(profile, begin + pd.to_timedelta(offsets, unit='s'), ports, 'TCP',
+                             self.rng.uniform(2, 5, count) * max_volume, 'off_hours_burst')]
+
+class BenchmarkCorpusBuilder:
+    """Construit, enregistre et recharge des corpus étiquetés de référence"""
+
+    DEFAULT_SCENARIOS = {
+        'slow_exfiltration': 3,
+        'c2_beaconing': 3,
+        'lateral_movement': 2,
+        'off_hours_burst': 4
+    }
+
+    def __init__(self, seed=42):
+        self.seed = seed
+        self.simulator = NetworkDataSimulator()
+
+    def build(self, num_devices=50, hours=24 * 7, scenarios=None,
+              background_anomaly_percentage=0, start_time=datetime(2024, 1, 1)):
+        """
+        Génère un corpus: trafic de fond simulé + scénarios d'attaque injectés
+
+        Args:
+            num_devices: Nombre d'appareils du réseau simulé
+            hours: Durée couverte par le corpus
+            scenarios: Dictionnaire {nom_scénario: nombre d'occurrences}
+            background_anomaly_percentage: Anomalies ponctuelles du simulateur dans le fond
+            start_time: Début du corpus (fixe par défaut pour un corpus reproductible)
+
+        Returns:
+            DataFrame trié par timestamp, enrichi des features du détecteur, avec les
+            colonnes d'étiquetage is_anomaly, anomaly_type, scenario_id et scenario_step
+        """
+        scenarios = scenarios or self.DEFAULT_SCENARIOS
+        rng = np.random.default_rng(self.seed)
+        library = AttackScenarioLibrary(rng)
+
+        # Profils partagés entre le trafic de fond et les scénarios (tirés avec le
+        # module random, d'où la graine fixée ici aussi)
+        random.seed(self.seed)
+        profiles = [self.simulator._generate_device_profile(f"device_{i:03d}") for i in range(num_devices)]
+        background = pd.concat(list(self.simulator.iter_network_chunks(
+            hours=hours, anomaly_percentage=background_anomaly_percentage,
+            start_time=start_time, seed=self.seed, device_profiles=profiles
+        )), ignore_index=True)
+        background['scenario_id'] = -1
+        background['scenario_step'] = None
+
+        frames = [background]
+        end_time = start_time + timedelta(hours=hours)
+        scenario_id = 0
+        for name, occurrences in scenarios.items():
+            if name not in library.scenarios:
+                raise ValueError(f"Scénario inconnu: {name}")
+            for _ in range(occurrences):
+                for frame in library.scenarios[name](profiles, start_time, end_time):
+                    frame['scenario_id'] = scenario_id
+                    frames.append(frame)
+                scenario_id += 1
+
+        corpus = pd.concat(frames, ignore_index=True)
+        corpus['timestamp'] = pd.to_datetime(corpus['timestamp']).astype('datetime64[ms]')
+        corpus = corpus.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+        return DeviceBaselineEnricher().enrich(corpus)
+
+    def save(self, corpus, path, compress=True):
+        """Enregistre un corpus au format colonnaire avec son manifeste"""
+        labelled = corpus[corpus['scenario_id'] >= 0]
+        manifest = {
+            'seed': self.seed,
+            'rows': len(corpus),
+            'devices': int(corpus['device_id'].nunique()),
+            'start': corpus['timestamp'].min(),
+            'end': corpus['timestamp'].max(),
+            'scenarios': labelled.groupby('anomaly_type')['scenario_id'].nunique().to_dict(),
+            'anomalous_rows': int(corpus['is_anomaly'].sum())
+        }
+        return write_columns(path, corpus, metadata=manifest, compress=compress)
+
+    def build_and_save(self, path, compress=True, **build_options):
+        """Génère puis enregistre un corpus, et retourne son chemin"""
+        return self.save(self.build(**build_options), path, compress=compress)
+
+    @staticmethod
+    def load(path):
+        """Recharge un corpus enregistré: retourne (DataFrame, manifeste)"""
+        return read_columns(path)
+
+def benchmark_detector(detector, corpus, train_fraction=0.5, contamination=0.1):
+    """
+    Mesure le débit et la précision d'un détecteur sur un corpus de référence
+
+    Le détecteur est entraîné sur le début chronologique du corpus puis évalué
+    sur la suite.
+
+    Args:
+        detector: Instance d'AnomalyDetector
+        corpus: Corpus produit par BenchmarkCorpusBuilder
+        train_fraction: Part du corpus utilisée pour l'entraînement
+        contamination: Paramètre de contamination de l'Isolation Forest
+
+    Returns:
+        Dictionnaire avec les temps, débits, précision, rappel global et rappel par scénario
+    """
+    split = int(len(corpus) * train_fraction)
+    train, test = corpus.iloc[:split], corpus.iloc[split:]
+
+    started = time.perf_counter()
+    detector.train_model(train, contamination=contamination)
+    train_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    detected = detector.detect_anomalies(test)
+    detect_seconds = time.perf_counter() - started
+
+    predicted = test.index.isin(detected.index)
+    actual = test['is_anomaly'].astype(bool).values
+    true_positives = int((predicted & actual).sum())
+
+    recall_by_scenario = {}
+    for name, rows in test[actual].groupby('anomaly_type'):
+        recall_by_scenario[name] = round(float(predicted[test.index.get_indexer(rows.index)].mean()), 3)
+
+    return {
+        'train_rows': len(train),
+        'test_rows': len(test),
+        'train_seconds': round(train_seconds, 3),
+        'detect_seconds': round(detect_seconds, 3),
+        'detect_rows_per_sec': round(len(test) / detect_seconds) if detect_seconds > 0 else None,
+        'precision': round(true_positives / int(predicted.sum()), 3) if predicted.sum() else 0.0,
+        'recall': round(true_positives / int(actual.sum()), 3) if actual.sum() else 0.0,
+        'recall_by_scenario': recall_by_scenario
+    }
@@ -0,0 +1,139 @@
+import pandas as pd
+import numpy as np
+
+class DeviceBaselineEnricher:
+    """
+    Enrichit les données réseau avec les statistiques de référence de chaque appareil
+
+    Les features attendues par AnomalyDetector (avg_data_volume, std_data_volume,
+    max_data_volume, unique_ports, hour, day_of_week) sont calculées de façon
+    incrémentale: chaque ligne ne voit que l'historique de son appareil jusqu'à
+    elle-même, et l'état est conservé d'un lot à l'autre. Le même enrichisseur
+    peut donc être appliqué aux blocs du simulateur comme aux frames du collecteur.
+    """
+
+    PORT_SPACE = 65536
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Réinitialise l'historique de tous les appareils"""
+        self.device_codes = {}
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.means = np.zeros(0)
+        self.m2 = np.zeros(0)  # Somme des carrés des écarts (algorithme de Welford)
+        self.maxima = np.zeros(0)
+        self.port_counts = np.zeros(0, dtype=np.int64)
+        # Couples (appareil, port) déjà vus, encodés code * 65536 + port et triés
+        self.port_keys = np.zeros(0, dtype=np.int64)
+
+    def _encode_devices(self, device_ids):
+        """Associe un code entier stable à chaque appareil, en agrandissant l'état si besoin"""
+        local_codes, uniques = pd.factorize(device_ids)
+        mapping = np.empty(len(uniques), dtype=np.int64)
+
+        for i, device_id in enumerate(uniques):
+            code = self.device_codes.get(device_id)
+            if code is None:
+                code = len(self.device_codes)
+                self.device_codes[device_id] = code
+            mapping[i] = code
+
+        grow = len(self.device_codes) - len(self.counts)
+        if grow > 0:
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+            self.means = np.concatenate([self.means, np.zeros(grow)])
+            self.m2 = np.concatenate([self.m2, np.zeros(grow)])
+            self.maxima = np.concatenate([self.maxima, np.full(grow, -np.inf)])
+            self.port_counts = np.concatenate([self.port_counts, np.zeros(grow, dtype=np.int64)])
+
+        return mapping[local_codes]
+
+    def enrich(self, df):
+        """
+        Ajoute les features temporelles et de référence à un lot de données réseau
+
+        Args:
+            df: DataFrame avec au moins timestamp, device_id, port et data_volume_mb
+
+        Returns:
+            Copie du DataFrame avec les colonnes hour, day_of_week, is_weekend,
+            avg_data_volume, std_data_volume, max_data_volume et unique_ports
+        """
+        data = df.copy()
+        if data.empty:
+            return data
+
+        timestamps = pd.to_datetime(data['timestamp'])
+        data['hour'] = timestamps.dt.hour.values
+        data['day_of_week'] = timestamps.dt.dayofweek.values
+        data['is_weekend'] = np.isin(data['day_of_week'].values, [5, 6])
+
+        # Traitement dans l'ordre chronologique, résultat restitué dans l'ordre d'origine
+        order = np.argsort(timestamps.values, kind='stable')
+        codes = self._encode_devices(data['device_id'].astype(str).values)[order]
+        volumes = pd.to_numeric(data['data_volume_mb'], errors='coerce').fillna(0).values[order]
+        ports = pd.to_numeric(data['port'], errors='coerce').fillna(0).values.astype(np.int64)[order]
+        ports = np.clip(ports, 0, self.PORT_SPACE - 1)
+
+        prev_counts = self.counts[codes]
+        prev_m2 = self.m2[codes]
+
+        frame = pd.DataFrame({'code': codes, 'volume': volumes})
+        grouped = frame.groupby('code', sort=False)
+
+        # Les écarts sont pris par rapport à la moyenne connue de l'appareil (ou à sa
+        # première valeur pour un nouvel appareil), ce qui évite la perte de précision
+        # des sommes de carrés brutes et annule la contribution de l'historique
+        shift = np.where(prev_counts > 0, self.means[codes], grouped['volume'].transform('first').values)
+        frame['delta'] = volumes - shift
+        frame['delta_sq'] = frame['delta'] ** 2
+
+        counts = prev_counts + grouped.cumcount().values + 1
+        cumulated = frame.groupby('code', sort=False)[['delta', 'delta_sq']].cumsum()
+        sum_delta = cumulated['delta'].values
+        means = shift + sum_delta / counts
+        m2 = prev_m2 + cumulated['delta_sq'].values - sum_delta ** 2 / counts
+        stds = np.sqrt(np.where(counts > 1, np.maximum(m2, 0) / np.maximum(counts - 1, 1), 0))
+        maxima = np.maximum(self.maxima[codes], grouped['volume'].cummax().values)
+
+        # Ports distincts: un couple (appareil, port) est nouveau s'il n'a été vu ni
+        # dans l'historique ni plus tôt dans le lot
+        keys = codes * self.PORT_SPACE + ports
+        positions = np.searchsorted(self.port_keys, keys)
+        known = (positions < len(self.port_keys)) & (
+            self.port_keys[np.minimum(positions, len(self.port_keys) - 1)] == keys
+        ) if len(self.port_keys) else np.zeros(len(keys), dtype=bool)
+        new_keys = ~pd.Series(keys).duplicated().values & ~known
+        unique_ports = self.port_counts[codes] + pd.Series(new_keys).groupby(codes).cumsum().values
+
+        # Mise à jour de l'état avec la dernière ligne de chaque appareil
+        last = ~pd.Series(codes[::-1]).duplicated().values[::-1]
+        last_codes = codes[last]
+        self.counts[last_codes] = counts[last]
+        self.means[last_codes] = means[last]
+        self.m2[last_codes] = m2[last]
+        self.maxima[last_codes] = maxima[last]
+        self.port_counts[last_codes] = unique_ports[last]
+        self.port_keys = np.union1d(self.port_keys, keys[new_keys])
+
+        restore = np.empty_like(order)
+        restore[order] = np.arange(len(order))
+        data['avg_data_volume'] = np.round(means[restore], 2)
+        data['std_data_volume'] = np.round(stds[restore], 2)
+        data['max_data_volume'] = np.round(maxima[restore], 2)
+        data['unique_ports'] = unique_ports[restore]
+
+        return data
+
+    def get_device_baselines(self):
+        """Retourne l'état courant des statistiques de référence par appareil"""
+        return pd.DataFrame({
+            'device_id': list(self.device_codes.keys()),
+            'connections': self.counts,
+            'avg_data_volume': np.round(self.means, 2),
+            'std_data_volume': np.round(np.sqrt(np.where(self.counts > 1, self.m2 / np.maximum(self.counts - 1, 1), 0)), 2),
+            'max_data_volume': np.round(self.maxima, 2),
+            'unique_ports': self.port_counts
+        })
@@ -0,0 +1,143 @@
+"""
+Archive froide des données réseau AEGISLAN
+Les périodes anciennes de network_data sont compactées en segments colonnaires
+compressés (columnar_store). Un manifeste garde pour chaque segment ses bornes de
+temps et la liste de ses appareils (zone maps): une lecture n'ouvre que les
+segments qui recouvrent la fenêtre et l'appareil demandés.
+"""
+
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+from columnar_store import write_columns, read_columns
+
+class ColdArchive:
+    """Répertoire de segments archivés et son manifeste"""
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.segments = self._load_manifest()
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, self.MANIFEST)
+
+    def _load_manifest(self):
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return json.load(f)['segments']
+
+    def _save_manifest(self):
+        # Écriture atomique: un lecteur voit l'ancien ou le nouveau manifeste, jamais un fichier partiel
+        path = self._manifest_path()
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump({'segments': self.segments}, f, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+    def write_segment(self, frame, name, datetime_columns=('timestamp',)):
+        """
+        Archive un bloc de lignes (avec ts en millisecondes epoch) dans un nouveau segment
+
+        Args:
+            frame: Lignes à archiver
+            name: Nom du segment (ex: network_data_20240101)
+            datetime_columns: Colonnes de dates texte stockées en microsecondes epoch plutôt
+                              qu'en chaînes (une valeur distincte par ligne, le dictionnaire
+                              serait plus gros que la colonne)
+
+        Returns:
+            Entrée du manifeste du segment
+        """
+        data = frame.sort_values(['ts', 'id'] if 'id' in frame.columns else 'ts', kind='stable').copy()
+        for column in datetime_columns:
+            if column in data.columns:
+                # Entiers plutôt que datetime_ms de columnar_store: la précision des dates
+                # texte (microseconde) est conservée
+                parsed = pd.to_datetime(data[column], errors='coerce', format='mixed')
+                data[column] = parsed.values.astype('datetime64[us]').astype(np.int64)
+
+        with self._lock:
+            path = write_columns(os.path.join(self.directory, f"{name}-{len(self.segments):05d}"), data,
+                                 metadata={'name': name, 'datetime_columns': list(datetime_columns)})
+            entry = {
+                'file': os.path.basename(path),
+                'name': name,
+                'rows': len(data),
+                'min_ts': int(data['ts'].min()),
+                'max_ts': int(data['ts'].max()),
+                'devices': sorted(data['device_id'].astype(str).unique().tolist()),
+                'bytes': os.path.getsize(path)
+            }
+            self.segments.append(entry)
+            self.segments.sort(key=lambda segment: segment['min_ts'])
+            self._save_manifest()
+        return entry
+
+    def overlapping(self, start_ms=None, end_ms=None, device_id=None):
+        """Segments dont la zone map recouvre la fenêtre (bornes incluses) et l'appareil"""
+        return [
+            segment for segment in self.segments
+            if (start_ms is None or segment['max_ts'] >= start_ms)
+            and (end_ms is None or segment['min_ts'] <= end_ms)
+            and (device_id is None or str(device_id) in segment['devices'])
+        ]
+
+    def iter_frames(self, start_ms=None, end_ms=None, device_id=None, columns=None, datetime_format=None):
+        """
+        Lit les lignes archivées d'une fenêtre, un segment à la fois, dans l'ordre chronologique
+
+        Args:
+            start_ms, end_ms: Bornes incluses en millisecondes epoch (None: sans borne)
+            device_id: Limite la lecture à un appareil
+            columns: Colonnes à restituer, dans cet ordre
+            datetime_format: Format de restitution des dates stockées en microsecondes
+                             (par défaut, colonnes datetime64)
+
+        Yields:
+            Un DataFrame non vide par segment recouvrant la fenêtre
+        """
+        for segment in self.overlapping(start_ms, end_ms, device_id):
+            data, metadata = read_columns(os.path.join(self.directory, segment['file']))
+
+            mask = np.ones(len(data), dtype=bool)
+            if start_ms is not None:
+                mask &= data['ts'].values >= start_ms
+            if end_ms is not None:
+                mask &= data['ts'].values <= end_ms
+            if device_id is not None:
+                mask &= data['device_id'].values == str(device_id)
+            data = data[mask]
+            if data.empty:
+                continue
+
+            for column in metadata.get('datetime_columns', []):
+                if column in data.columns:
+                    data[column] = pd.to_datetime(data[column].values.astype('datetime64[us]'))
+                    if datetime_format:
+                        data[column] = data[column].dt.strftime(datetime_format)
+            yield data.reindex(columns=columns) if columns is not None else data
+
+    def read(self, start_ms=None, end_ms=None, device_id=None, columns=None, datetime_format=None):
+        """Lignes archivées d'une fenêtre en un seul DataFrame (vide si aucun segment ne la recouvre)"""
+        frames = list(self.iter_frames(start_ms, end_ms, device_id, columns, datetime_format))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def get_stats(self):
+        """Nombre de segments, de lignes et taille totale de l'archive"""
+        return {
+            'segments': len(self.segments),
+            'rows': sum(segment['rows'] for segment in self.segments),
+            'bytes': sum(segment['bytes'] for segment in self.segments),
+            'min_ts': self.segments[0]['min_ts'] if self.segments else None,
+            'max_ts': max(segment['max_ts'] for segment in self.segments) if self.segments else None
+        }
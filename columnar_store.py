@@ -0,0 +1,108 @@
+"""
+Stockage colonnaire compact pour AEGISLAN (corpus de benchmark, segments d'archive)
+Format .npz numpy: une entrée par colonne, chaînes encodées par dictionnaire,
+dates en millisecondes epoch. Ne dépend que de numpy et pandas.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+META_KEY = '__meta__'
+
+def _smallest_code_dtype(cardinality):
+    """Type entier le plus petit capable de contenir les codes d'un dictionnaire"""
+    if cardinality < 2 ** 7:
+        return np.int8
+    if cardinality < 2 ** 15:
+        return np.int16
+    return np.int32
+
+def write_columns(path, df, metadata=None, compress=True):
+    """
+    Écrit un DataFrame dans un fichier colonnaire .npz
+
+    Args:
+        path: Fichier de sortie (l'extension .npz est ajoutée si absente)
+        df: Données à écrire
+        metadata: Dictionnaire JSON-sérialisable stocké avec les colonnes
+        compress: Compression zip des colonnes (plus compact, chargement un peu plus lent)
+
+    Returns:
+        Chemin du fichier écrit
+    """
+    if not str(path).endswith('.npz'):
+        path = f"{path}.npz"
+
+    arrays = {}
+    schema = []
+
+    for column in df.columns:
+        series = df[column]
+
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.values.astype('datetime64[ms]').astype(np.int64)
+            kind = 'datetime_ms'
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy()
+            kind = 'numeric'
+        else:
+            codes, uniques = pd.factorize(series)
+            arrays[f"{column}.values"] = np.asarray(uniques, dtype=str)
+            values = codes.astype(_smallest_code_dtype(len(uniques)))
+            kind = 'dictionary'
+
+        arrays[column] = values
+        schema.append({'name': column, 'kind': kind})
+
+    arrays[META_KEY] = np.array(json.dumps({
+        'rows': len(df),
+        'schema': schema,
+        'metadata': metadata or {}
+    }, default=str))
+
+    if compress:
+        np.savez_compressed(path, **arrays)
+    else:
+        np.savez(path, **arrays)
+
+    return path
+
+def read_metadata(path):
+    """Lit uniquement l'en-tête (schéma, nombre de lignes, métadonnées) d'un fichier colonnaire"""
+    with np.load(path, allow_pickle=False) as archive:
+        return json.loads(str(archive[META_KEY]))
+
+def read_columns(path, columns=None):
+    """
+    Charge un fichier colonnaire .npz
+
+    Args:
+        path: Fichier à lire
+        columns: Sous-ensemble de colonnes à charger (toutes par défaut)
+
+    Returns:
+        Tuple (DataFrame, métadonnées)
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        header = json.loads(str(archive[META_KEY]))
+        data = {}
+
+        for field in header['schema']:
+            name = field['name']
+            if columns is not None and name not in columns:
+                continue
+
+            values = archive[name]
+            if field['kind'] == 'datetime_ms':
+                data[name] = values.astype('datetime64[ms]')
+            elif field['kind'] == 'dictionary':
+                dictionary = archive[f"{name}.values"].astype(object)
+                decoded = np.take(dictionary, values.astype(np.int64), mode='clip') if len(dictionary) else \
+                    np.full(len(values), None, dtype=object)
+                decoded[values < 0] = None
+                data[name] = decoded
+            else:
+                data[name] = values
+
+    return pd.DataFrame(data), header['metadata']
@@ -38,7 +38,10 @@ class ConfigManager:
             "database": {
                 "type": "sqlite",  # sqlite ou postgresql
                 "sqlite": {
-                    "path": "data/aegislan.db"
+                    "path": "data/aegislan.db",
+                    "partition": None,  # None, "day" ou "hour": network_data réparti en shards
+                    "archive_dir": None,  # Répertoire de l'archive froide (segments colonnaires)
+                    "hot_tier": False  # Fenêtre récente de network_data/anomalies tenue en mémoire
                 },
                 "postgresql": {
                     "host": os.getenv("PGHOST", "localhost"),
@@ -47,7 +50,14 @@ class ConfigManager:
                     "user": os.getenv("PGUSER", "postgres"),
                     "password": os.getenv("PGPASSWORD", ""),
                     "ssl_mode": "prefer",
-                    "connection_string": os.getenv("DATABASE_URL")
+                    "connection_string": os.getenv("DATABASE_URL"),
+                    # Réplica en lecture pour le tableau de bord et les exports (optionnel)
+                    "replica_connection_string": os.getenv("DATABASE_REPLICA_URL"),
+                    # Pools de connexions (écriture et lecture): connexions ouvertes / maximum
+                    "pool_min": 1,
+                    "pool_max": 10,
+                    # network_data et system_logs partitionnés par "day" ou "week" (None: tables uniques)
+                    "partition": "day"
                 },
                 "retention_days": 90,
                 "cleanup_enabled": True,
@@ -256,7 +266,10 @@ def create_database_manager(config_manager: ConfigManager):
             
             connection_string = f"postgresql://{user}:{password}@{host}:{port}/{database}"
         
-        return PostgreSQLManager(connection_string)
+        return PostgreSQLManager(connection_string,
+                                 replica_connection_string=pg_config.get("replica_connection_string"),
+                                 pool_min=pg_config.get("pool_min", 1), pool_max=pg_config.get("pool_max", 10),
+                                 partition=pg_config.get("partition", "day"))
     
     else:  # SQLite par défaut
         from database_manager import DatabaseManager
@@ -264,7 +277,9 @@ def create_database_manager(config_manager: ConfigManager):
         sqlite_config = db_config.get("sqlite", {})
         db_path = sqlite_config.get("path", "data/aegislan.db")
         
-        return DatabaseManager(db_path)
+        return DatabaseManager(db_path, partition=sqlite_config.get("partition"),
+                               archive_dir=sqlite_config.get("archive_dir"),
+                               use_hot_tier=sqlite_config.get("hot_tier", False))
 
 if __name__ == "__main__":
     # Test de configuration
@@ -17,7 +17,7 @@ class Dashboard:
             'Faible': '#44AA44'
         }
     
-    def render_dashboard(self, network_data, anomalies_data, model_trained):
+    def render_dashboard(self, network_data, anomalies_data, model_trained, timeline_data=None):
         """
         Affiche le tableau de bord principal
         
@@ -25,6 +25,8 @@ class Dashboard:
             network_data: DataFrame avec toutes les données réseau
             anomalies_data: DataFrame avec les anomalies détectées
             model_trained: Boolean indiquant si le modèle est entraîné
+            timeline_data: Chronologie lue dans la base (get_traffic_timeline), à la
+                           place de l'agrégation des données de la session
         """
         # Section d'état du système
         self._render_system_status(network_data, anomalies_data, model_trained)
@@ -44,7 +46,7 @@ class Dashboard:
         col1, col2 = st.columns(2)
         
         with col1:
-            self._render_traffic_timeline(network_data, anomalies_data)
+            self._render_traffic_timeline(network_data, anomalies_data, timeline_data)
             self._render_device_activity(network_data)
         
         with col2:
@@ -157,27 +159,33 @@ class Dashboard:
                         
                         st.divider()
     
-    def _render_traffic_timeline(self, network_data, anomalies_data):
+    def _render_traffic_timeline(self, network_data, anomalies_data, timeline_data=None):
         """Graphique temporel du trafic"""
         st.subheader("Network Traffic Timeline")
         
-        # Agrégation par heure
-        hourly_data = network_data.groupby(network_data['timestamp'].dt.floor('H')).agg({
-            'data_volume_mb': 'sum',
-            'device_id': 'count'
-        }).reset_index()
-        hourly_data.columns = ['hour', 'total_volume', 'connection_count']
-        
-        # Anomalies par heure
-        if not anomalies_data.empty:
-            hourly_anomalies = anomalies_data.groupby(
-                anomalies_data['timestamp'].dt.floor('H')
-            ).size().reset_index()
-            hourly_anomalies.columns = ['hour', 'anomaly_count']
-            hourly_data = hourly_data.merge(hourly_anomalies, on='hour', how='left')
-            hourly_data['anomaly_count'] = hourly_data['anomaly_count'].fillna(0)
+        if timeline_data is not None:
+            # Agrégats de la base: à la minute pour les fenêtres courtes, à l'heure au-delà
+            hourly_data = timeline_data.rename(columns={'timestamp': 'hour'})[
+                ['hour', 'total_volume', 'connection_count', 'anomaly_count']]
+            st.caption(f"Source: {'minute' if timeline_data.attrs.get('tier') == 'minute' else 'hourly'} summaries")
         else:
-            hourly_data['anomaly_count'] = 0
+            # Agrégation par heure
+            hourly_data = network_data.groupby(network_data['timestamp'].dt.floor('H')).agg({
+                'data_volume_mb': 'sum',
+                'device_id': 'count'
+            }).reset_index()
+            hourly_data.columns = ['hour', 'total_volume', 'connection_count']
+            
+            # Anomalies par heure
+            if not anomalies_data.empty:
+                hourly_anomalies = anomalies_data.groupby(
+                    anomalies_data['timestamp'].dt.floor('H')
+                ).size().reset_index()
+                hourly_anomalies.columns = ['hour', 'anomaly_count']
+                hourly_data = hourly_data.merge(hourly_anomalies, on='hour', how='left')
+                hourly_data['anomaly_count'] = hourly_data['anomaly_count'].fillna(0)
+            else:
+                hourly_data['anomaly_count'] = 0
         
         # Graphique combiné
         fig = make_subplots(
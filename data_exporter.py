@@ -0,0 +1,120 @@
+"""
+Export en flux des tables AEGISLAN vers CSV, JSON Lines ou Parquet
+Les gestionnaires de base fournissent des blocs de lignes (pagination par clé sur
+SQLite, curseur serveur sur PostgreSQL); chaque bloc est ajouté au fichier puis
+libéré, la mémoire utilisée ne dépend donc que de la taille des blocs.
+"""
+
+import gzip
+import os
+import time
+
+class StreamingExporter:
+    """Écrit des blocs successifs d'un même tableau dans un fichier d'export"""
+
+    FORMATS = ('csv', 'jsonl', 'parquet')
+
+    def __init__(self, path, format='csv', compress=False):
+        """
+        Args:
+            path: Fichier de sortie (l'extension .gz est ajoutée si compress, hors Parquet)
+            format: 'csv', 'jsonl' (ou 'json', écrit en JSON Lines) ou 'parquet'
+            compress: Compression gzip (codec interne pour Parquet)
+        """
+        format = 'jsonl' if format == 'json' else format
+        if format not in self.FORMATS:
+            raise ValueError(f"Format d'export inconnu: {format} (attendu: {', '.join(self.FORMATS)})")
+        if compress and format != 'parquet' and not str(path).endswith('.gz'):
+            path = f"{path}.gz"
+
+        self.path = path
+        self.format = format
+        self.compress = compress
+        self.rows = 0
+        self._file = None
+        self._parquet_writer = None
+        self._parquet_schema = None
+
+    def _open_text(self):
+        if self.compress:
+            # Niveau 6 (celui de gzip en ligne de commande): le niveau 9 par défaut de
+            # Python ralentit l'export de plusieurs fois pour quelques pourcents gagnés
+            return gzip.open(self.path, 'wt', compresslevel=6, encoding='utf-8', newline='')
+        return open(self.path, 'w', encoding='utf-8', newline='')
+
+    def write(self, chunk):
+        """Ajoute un bloc (DataFrame) au fichier"""
+        if chunk.empty and self.rows:
+            return
+
+        if self.format == 'parquet':
+            self._write_parquet(chunk)
+        else:
+            if self._file is None:
+                self._file = self._open_text()
+            if self.format == 'csv':
+                chunk.to_csv(self._file, index=False, header=self.rows == 0, lineterminator='\n')
+            elif not chunk.empty:
+                lines = chunk.to_json(orient='records', lines=True, date_format='iso')
+                self._file.write(lines if lines.endswith('\n') else lines + '\n')
+
+        self.rows += len(chunk)
+
+    def _write_parquet(self, chunk):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow)")
+
+        # Le schéma du premier bloc s'impose aux suivants (un même row group par bloc)
+        table = pa.Table.from_pandas(chunk, schema=self._parquet_schema, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_schema = table.schema
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema,
+                                                    compression='gzip' if self.compress else 'snappy')
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+def export_chunks(chunks, path, format='csv', compress=False, progress_callback=None, total_rows=None):
+    """
+    Écrit un itérable de DataFrames dans un fichier d'export
+
+    Args:
+        chunks: Itérable de DataFrames de mêmes colonnes
+        path: Fichier de sortie
+        format: 'csv', 'jsonl'/'json' ou 'parquet'
+        compress: Compression gzip
+        progress_callback: Fonction appelée après chaque bloc avec (lignes écrites, total ou None)
+        total_rows: Nombre total de lignes attendu, transmis à progress_callback
+
+    Returns:
+        Dictionnaire avec le chemin, le nombre de lignes et de blocs, la durée et la taille du fichier
+    """
+    started = time.perf_counter()
+    exporter = StreamingExporter(path, format=format, compress=compress)
+    chunk_count = 0
+
+    try:
+        for chunk in chunks:
+            exporter.write(chunk)
+            chunk_count += 1
+            if progress_callback:
+                progress_callback(exporter.rows, total_rows)
+    finally:
+        exporter.close()
+
+    return {
+        'path': exporter.path,
+        'rows': exporter.rows,
+        'chunks': chunk_count,
+        'seconds': round(time.perf_counter() - started, 3),
+        'bytes': os.path.getsize(exporter.path) if os.path.exists(exporter.path) else 0
+    }
@@ -3,6 +3,9 @@ import numpy as np
 from datetime import datetime, timedelta
 import random
 import ipaddress
+import io
+import time
+from baseline_enricher import DeviceBaselineEnricher
 
 class NetworkDataSimulator:
     """Simule des données de trafic réseau réalistes pour le prototype AEGISLAN"""
@@ -12,6 +15,25 @@ class NetworkDataSimulator:
         self.common_ports = [22, 23, 25, 53, 80, 110, 143, 443, 993, 995, 3389, 5432, 3306]
         self.protocols = ['TCP', 'UDP', 'ICMP']
         self.unusual_protocols = ['SCTP', 'GRE', 'OSPF', 'EIGRP'] # Liste explicite pour les anomalies
+        self.anomaly_types = [
+            'unusual_port',      # Port inhabituel
+            'unusual_time',      # Activité à des heures inhabituelles
+            'high_volume',       # Volume de données anormalement élevé
+            'unusual_protocol',  # Protocole inhabituel
+            'port_scanning'      # Scan de ports
+        ]
+        # Ajustement de la probabilité d'activité selon la fréquence de connexion
+        self.frequency_multipliers = {
+            'low': 0.5,
+            'medium': 1.0,
+            'high': 1.5,
+            'very_high': 2.0
+        }
+        # Préfixes OUI reconnus par RealNetworkCollector._detect_device_type
+        self.known_vendors = {
+            '00:50:56': 'VMware', '08:00:27': 'VirtualBox', '52:54:00': 'QEMU',
+            '28:6A:BA': 'Apple', '00:15:5D': 'Microsoft', '00:25:90': 'Samsung'
+        }
         
     def _generate_mac_address(self):
         """Génère une adresse MAC aléatoire"""
@@ -92,14 +114,7 @@ class NetworkDataSimulator:
             base_activity_prob = 0.1
         
         # Ajustement selon la fréquence de connexion
-        freq_multiplier = {
-            'low': 0.5,
-            'medium': 1.0,
-            'high': 1.5,
-            'very_high': 2.0
-        }
-        
-        activity_prob = base_activity_prob * freq_multiplier.get(device_profile['connection_frequency'], 1.0)
+        activity_prob = base_activity_prob * self.frequency_multipliers.get(device_profile['connection_frequency'], 1.0)
         
         if random.random() < activity_prob:
             # Sélection du port (préférence pour les ports habituels)
@@ -131,15 +146,7 @@ class NetworkDataSimulator:
     
     def _generate_anomalous_traffic(self, device_profile, timestamp):
         """Génère du trafic anormal pour simuler des comportements suspects"""
-        anomaly_types = [
-            'unusual_port',      # Port inhabituel
-            'unusual_time',      # Activité à des heures inhabituelles
-            'high_volume',       # Volume de données anormalement élevé
-            'unusual_protocol',  # Protocole inhabituel
-            'port_scanning'      # Scan de ports
-        ]
-        
-        anomaly_type = random.choice(anomaly_types)
+        anomaly_type = random.choice(self.anomaly_types)
         
         if anomaly_type == 'unusual_port':
             # Utilisation d'un port inhabituel
@@ -253,24 +260,347 @@ class NetworkDataSimulator:
         df = pd.DataFrame(network_data)
         
         if not df.empty:
-            # Ajout de features calculées
-            df['hour'] = df['timestamp'].dt.hour
-            df['day_of_week'] = df['timestamp'].dt.dayofweek
-            df['is_weekend'] = df['day_of_week'].isin([5, 6])
+            # Tri par timestamp
+            df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
             
-            # Calcul de statistiques par appareil
-            device_stats = df.groupby('device_id').agg({
-                'data_volume_mb': ['mean', 'std', 'max'],
-                'port': 'nunique'
-            }).round(2)
+            # Ajout des features calculées: statistiques glissantes par appareil,
+            # chaque ligne ne voyant que l'historique qui la précède
+            df = DeviceBaselineEnricher().enrich(df)
+        
+        return df
+
+    def _build_profile_arrays(self, device_profiles):
+        """Convertit les profils d'appareils en tableaux numpy pour la génération vectorisée"""
+        max_prefs = max(len(p['ports_preference']) for p in device_profiles)
+        preferred_ports = np.zeros((len(device_profiles), max_prefs), dtype=np.int64)
+        for i, profile in enumerate(device_profiles):
+            preferred_ports[i, :len(profile['ports_preference'])] = profile['ports_preference']
+        
+        return {
+            'device_id': np.array([p['device_id'] for p in device_profiles], dtype=object),
+            'mac_address': np.array([p['mac_address'] for p in device_profiles], dtype=object),
+            'ip_address': np.array([p['ip_address'] for p in device_profiles], dtype=object),
+            'device_type': np.array([p['device_type'] for p in device_profiles], dtype=object),
+            'activity_start': np.array([p['activity_hours'][0] for p in device_profiles]),
+            'activity_end': np.array([p['activity_hours'][1] for p in device_profiles]),
+            'frequency': np.array([self.frequency_multipliers.get(p['connection_frequency'], 1.0)
+                                   for p in device_profiles]),
+            'preferred_ports': preferred_ports,
+            'preferred_count': np.array([len(p['ports_preference']) for p in device_profiles]),
+            'volume_min': np.array([p['data_volume_range'][0] for p in device_profiles], dtype=np.int64),
+            'volume_max': np.array([p['data_volume_range'][1] for p in device_profiles], dtype=np.int64)
+        }
+    
+    def iter_network_chunks(self, num_devices=20, hours=24, anomaly_percentage=5,
+                            interval_minutes=10, ticks_per_chunk=144, start_time=None,
+                            seed=None, device_profiles=None):
+        """
+        Génère le trafic simulé par blocs, de façon vectorisée avec numpy
+        
+        Reprend les profils et les types d'anomalies de generate_network_data, mais
+        tire les événements de tous les appareils d'un bloc de ticks en une seule fois.
+        Destiné aux volumes importants (benchmarks, peuplement de bases de test).
+        
+        Args:
+            num_devices: Nombre d'appareils à simuler (ignoré si device_profiles est fourni)
+            hours: Nombre d'heures de données à générer
+            anomaly_percentage: Pourcentage d'anomalies à inclure
+            interval_minutes: Intervalle entre deux ticks de simulation
+            ticks_per_chunk: Nombre de ticks par bloc produit
+            start_time: Début de la période (par défaut: maintenant - hours)
+            seed: Graine pour des données reproductibles
+            device_profiles: Profils d'appareils existants à réutiliser
+        
+        Yields:
+            DataFrame par bloc, trié par timestamp, avec les colonnes brutes du simulateur
+        """
+        rng = np.random.default_rng(seed)
+        if seed is not None:
+            random.seed(seed)
+        
+        if device_profiles is None:
+            device_profiles = [self._generate_device_profile(f"device_{i:03d}") for i in range(num_devices)]
+        profiles = self._build_profile_arrays(device_profiles)
+        num_devices = len(device_profiles)
+        
+        if start_time is None:
+            start_time = datetime.now() - timedelta(hours=hours)
+        start = np.datetime64(pd.Timestamp(start_time).floor('s').to_datetime64(), 'ms')
+        interval = np.timedelta64(int(interval_minutes * 60 * 1000), 'ms')
+        total_ticks = int(np.ceil(hours * 60 / interval_minutes))
+        
+        common_ports = np.array(self.common_ports)
+        protocols = np.array(self.protocols, dtype=object)
+        unusual_protocols = np.array(self.unusual_protocols, dtype=object)
+        anomaly_types = np.array(self.anomaly_types, dtype=object)
+        scan_code = self.anomaly_types.index('port_scanning')
+        
+        for first_tick in range(0, total_ticks, ticks_per_chunk):
+            ticks = np.arange(first_tick, min(first_tick + ticks_per_chunk, total_ticks))
+            tick_times = start + ticks * interval
+            tick_hours = pd.DatetimeIndex(tick_times).hour.values
             
-            device_stats.columns = ['avg_data_volume', 'std_data_volume', 'max_data_volume', 'unique_ports']
-            device_stats = device_stats.reset_index()
+            # Grille ticks x appareils
+            tick_idx = np.repeat(np.arange(len(ticks)), num_devices)
+            dev_idx = np.tile(np.arange(num_devices), len(ticks))
             
-            # Merge avec les données principales
-            df = df.merge(device_stats, on='device_id', how='left')
+            # Décision: trafic normal ou anormal?
+            anomalous = rng.random(len(tick_idx)) < (anomaly_percentage / 100)
             
-            # Tri par timestamp
-            df = df.sort_values('timestamp').reset_index(drop=True)
+            # Trafic normal: probabilité d'activité selon les heures et la fréquence
+            hour = tick_hours[tick_idx]
+            act_start = profiles['activity_start'][dev_idx]
+            act_end = profiles['activity_end'][dev_idx]
+            active = np.where(act_start <= act_end,
+                              (act_start <= hour) & (hour <= act_end),
+                              (hour >= act_start) | (hour <= act_end))
+            activity_prob = np.where(active, 0.7, 0.1) * profiles['frequency'][dev_idx]
+            normal = ~anomalous & (rng.random(len(tick_idx)) < activity_prob)
+            
+            n_tick, n_dev = tick_idx[normal], dev_idx[normal]
+            n_port = np.where(
+                rng.random(len(n_dev)) < 0.8,
+                profiles['preferred_ports'][n_dev, rng.integers(0, profiles['preferred_count'][n_dev])],
+                common_ports[rng.integers(0, len(common_ports), len(n_dev))]
+            )
+            n_volume = rng.integers(profiles['volume_min'][n_dev], profiles['volume_max'][n_dev] + 1).astype(float)
+            n_protocol = protocols[rng.integers(0, len(protocols), len(n_dev))]
+            n_type = np.full(len(n_dev), None, dtype=object)
+            
+            # Anomalies à événement unique
+            a_tick, a_dev = tick_idx[anomalous], dev_idx[anomalous]
+            a_code = rng.integers(0, len(anomaly_types), len(a_dev))
+            single = a_code != scan_code
+            a_tick, a_dev, a_code = a_tick[single], a_dev[single], a_code[single]
+            a_port = profiles['preferred_ports'][a_dev, rng.integers(0, profiles['preferred_count'][a_dev])]
+            a_port = np.where(a_code == 0, rng.integers(1024, 65536, len(a_dev)), a_port)
+            a_protocol = np.where(a_code == 3,
+                                  unusual_protocols[rng.integers(0, len(unusual_protocols), len(a_dev))],
+                                  protocols[rng.integers(0, len(protocols), len(a_dev))])
+            vol_min, vol_max = profiles['volume_min'][a_dev], profiles['volume_max'][a_dev]
+            a_volume = np.where(a_code == 2,
+                                rng.integers(vol_max * 5, vol_max * 20 + 1),
+                                rng.integers(vol_min, vol_max + 1)).astype(float)
+            
+            # Scans de ports: une rafale de 15 à 50 connexions par anomalie
+            s_count = rng.integers(15, 51, int((~single).sum()))
+            s_tick = np.repeat(tick_idx[anomalous][~single], s_count)
+            s_dev = np.repeat(dev_idx[anomalous][~single], s_count)
+            s_port = rng.integers(1, 1025, len(s_dev))
+            s_protocol = np.full(len(s_dev), 'TCP', dtype=object)
+            s_volume = rng.uniform(0.01, 0.1, len(s_dev))
+            
+            all_tick = np.concatenate([n_tick, a_tick, s_tick])
+            all_dev = np.concatenate([n_dev, a_dev, s_dev])
+            order = np.argsort(all_tick, kind='stable')
+            all_tick, all_dev = all_tick[order], all_dev[order]
+            
+            chunk = pd.DataFrame({
+                'timestamp': tick_times[all_tick],
+                'device_id': profiles['device_id'][all_dev],
+                'mac_address': profiles['mac_address'][all_dev],
+                'ip_address': profiles['ip_address'][all_dev],
+                'device_type': profiles['device_type'][all_dev],
+                'port': np.concatenate([n_port, a_port, s_port])[order],
+                'protocol': np.concatenate([n_protocol, a_protocol, s_protocol])[order],
+                'data_volume_mb': np.concatenate([n_volume, a_volume, s_volume])[order],
+                'is_anomaly': np.concatenate([np.zeros(len(n_dev), dtype=bool),
+                                              np.ones(len(a_dev) + len(s_dev), dtype=bool)])[order],
+                'anomaly_type': np.concatenate([n_type, anomaly_types[a_code],
+                                                np.full(len(s_dev), 'port_scanning', dtype=object)])[order]
+            })
+            
+            if not chunk.empty:
+                yield chunk
+    
+    def write_router_logs(self, path, num_devices=20, hours=24, anomaly_percentage=5,
+                          max_bytes=None, buffer_size=8 * 1024 * 1024, seed=None, **chunk_options):
+        """
+        Écrit le trafic simulé sous forme de logs routeur/firewall
         
-        return df
+        Le format est celui attendu par RealNetworkCollector.parse_router_logs:
+        "YYYY-MM-DD HH:MM:SS src_ip dst_ip port protocol action", les anomalies
+        étant journalisées avec l'action "deny".
+        
+        Args:
+            path: Fichier de sortie
+            num_devices: Nombre d'appareils à simuler
+            hours: Nombre d'heures de trafic
+            anomaly_percentage: Pourcentage d'anomalies
+            max_bytes: Arrête l'écriture une fois cette taille atteinte (ex: 2 * 1024**3)
+            buffer_size: Taille du tampon d'écriture
+            seed: Graine pour des fichiers reproductibles
+            **chunk_options: Options transmises à iter_network_chunks
+        
+        Returns:
+            Dictionnaire avec le nombre de lignes, d'octets et le débit d'écriture
+        """
+        rng = np.random.default_rng(seed)
+        destinations = np.array([f"203.0.113.{i}" for i in range(1, 255)] +
+                                [f"198.51.100.{i}" for i in range(1, 255)], dtype=object)
+        
+        lines = 0
+        written = 0
+        started = time.perf_counter()
+        
+        with open(path, 'w', buffering=buffer_size, newline='') as f:
+            for chunk in self.iter_network_chunks(num_devices=num_devices, hours=hours,
+                                                  anomaly_percentage=anomaly_percentage,
+                                                  seed=seed, **chunk_options):
+                # Formatage des dates une seule fois par tick plutôt que par ligne
+                codes, stamps = pd.factorize(chunk['timestamp'])
+                log_lines = pd.DataFrame({
+                    'date': stamps.strftime('%Y-%m-%d').values[codes],
+                    'time': stamps.strftime('%H:%M:%S').values[codes],
+                    'src_ip': chunk['ip_address'].values,
+                    'dst_ip': destinations[rng.integers(0, len(destinations), len(chunk))],
+                    'port': chunk['port'].values,
+                    'protocol': chunk['protocol'].values,
+                    'action': np.where(chunk['is_anomaly'].values, 'deny', 'allow')
+                })
+                
+                buffer = io.StringIO()
+                log_lines.to_csv(buffer, sep=' ', header=False, index=False, lineterminator='\n')
+                text = buffer.getvalue()
+                f.write(text)
+                
+                lines += len(log_lines)
+                written += len(text)
+                if max_bytes and written >= max_bytes:
+                    break
+        
+        return self._emitter_stats(path, lines, written, started, unit='lines')
+    
+    def write_nmap_xml(self, path, num_hosts=256, network='10.0.0.0/8', ports_per_host=3,
+                       hosts_per_write=10000, buffer_size=8 * 1024 * 1024, seed=None):
+        """
+        Écrit un document XML Nmap (format -oX) décrivant num_hosts hôtes actifs
+        
+        Le document est lisible par RealNetworkCollector._parse_nmap_output. Une partie
+        des adresses MAC utilise des préfixes OUI connus du collecteur, et quelques
+        hôtes n'ont pas d'adresse MAC (comme l'hôte qui lance le scan).
+        
+        Args:
+            path: Fichier de sortie
+            num_hosts: Nombre d'hôtes à décrire
+            network: Réseau dans lequel les adresses IPv4 sont attribuées
+            ports_per_host: Nombre de ports ouverts par hôte
+            hosts_per_write: Nombre d'hôtes formatés avant chaque écriture
+            buffer_size: Taille du tampon d'écriture
+            seed: Graine pour des fichiers reproductibles
+        
+        Returns:
+            Dictionnaire avec le nombre d'hôtes, d'octets et le débit d'écriture
+        """
+        net = ipaddress.ip_network(network)
+        if num_hosts > net.num_addresses - 2:
+            raise ValueError(f"Le réseau {network} ne peut contenir {num_hosts} hôtes")
+        
+        rng = np.random.default_rng(seed)
+        service_names = {22: 'ssh', 23: 'telnet', 25: 'smtp', 53: 'domain', 80: 'http', 110: 'pop3',
+                         143: 'imap', 443: 'https', 993: 'imaps', 995: 'pop3s', 3389: 'ms-wbt-server',
+                         5432: 'postgresql', 3306: 'mysql'}
+        oui_prefixes = list(self.known_vendors.items())
+        base_address = int(net.network_address) + 1
+        scan_start = int(time.time())
+        
+        written = 0
+        started = time.perf_counter()
+        
+        with open(path, 'w', buffering=buffer_size) as f:
+            header = (
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<nmaprun scanner="nmap" args="nmap -sS -O -oX - {network}" start="{scan_start}" '
+                'version="7.94" xmloutputversion="1.05">\n'
+                f'<scaninfo type="syn" protocol="tcp" numservices="1000" services="1-1000"/>\n'
+            )
+            f.write(header)
+            written += len(header)
+            
+            for first in range(0, num_hosts, hosts_per_write):
+                count = min(hosts_per_write, num_hosts - first)
+                mac_bytes = rng.integers(0, 256, (count, 3))
+                vendor_idx = rng.integers(0, len(oui_prefixes), count)
+                has_mac = rng.random(count) >= 0.02
+                ports = rng.permuted(np.tile(self.common_ports, (count, 1)), axis=1)[:, :ports_per_host]
+                
+                parts = []
+                for i in range(count):
+                    ip_address = str(ipaddress.IPv4Address(base_address + first + i))
+                    parts.append(f'<host starttime="{scan_start}" endtime="{scan_start + 1}">'
+                                 '<status state="up" reason="arp-response"/>'
+                                 f'<address addr="{ip_address}" addrtype="ipv4"/>')
+                    if has_mac[i]:
+                        prefix, vendor = oui_prefixes[vendor_idx[i]]
+                        suffix = ':'.join(f"{b:02X}" for b in mac_bytes[i])
+                        parts.append(f'<address addr="{prefix}:{suffix}" addrtype="mac" vendor="{vendor}"/>')
+                    parts.append('<hostnames/><ports>')
+                    for port in ports[i]:
+                        parts.append(f'<port protocol="tcp" portid="{port}"><state state="open" reason="syn-ack"/>'
+                                     f'<service name="{service_names.get(int(port), "unknown")}"/></port>')
+                    parts.append('</ports></host>\n')
+                
+                text = ''.join(parts)
+                f.write(text)
+                written += len(text)
+            
+            footer = (f'<runstats><finished time="{int(time.time())}"/>'
+                      f'<hosts up="{num_hosts}" down="0" total="{num_hosts}"/></runstats>\n</nmaprun>\n')
+            f.write(footer)
+            written += len(footer)
+        
+        return self._emitter_stats(path, num_hosts, written, started, unit='hosts')
+    
+    def _emitter_stats(self, path, count, written, started, unit):
+        """Statistiques d'écriture d'un émetteur de fichiers"""
+        elapsed = time.perf_counter() - started
+        return {
+            'path': path,
+            unit: count,
+            'bytes': written,
+            'seconds': round(elapsed, 3),
+            'mb_per_sec': round(written / (1024 * 1024) / elapsed, 2) if elapsed > 0 else None
+        }
+    
+    def write_to_storage(self, sink, num_devices=20, hours=24, anomaly_percentage=5,
+                         max_rows=None, progress_callback=None, **chunk_options):
+        """
+        Écrit le trafic simulé directement dans un backend de stockage, bloc par bloc
+        
+        Args:
+            sink: Destination créée par storage_sinks.create_sink (SQLite, PostgreSQL, fichiers)
+            num_devices: Nombre d'appareils à simuler
+            hours: Nombre d'heures de trafic
+            anomaly_percentage: Pourcentage d'anomalies
+            max_rows: Nombre maximal de lignes à écrire
+            progress_callback: Fonction appelée avec le nombre de lignes écrites après chaque bloc
+            **chunk_options: Options transmises à iter_network_chunks
+        
+        Returns:
+            Dictionnaire avec le nombre de lignes écrites, la durée et le débit
+        """
+        rows = 0
+        started = time.perf_counter()
+        
+        try:
+            for chunk in self.iter_network_chunks(num_devices=num_devices, hours=hours,
+                                                  anomaly_percentage=anomaly_percentage, **chunk_options):
+                if max_rows is not None and rows + len(chunk) > max_rows:
+                    chunk = chunk.iloc[:max_rows - rows]
+                
+                sink.write(chunk)
+                rows += len(chunk)
+                
+                if progress_callback:
+                    progress_callback(rows)
+                if max_rows is not None and rows >= max_rows:
+                    break
+        finally:
+            sink.close()
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'rows': rows,
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(rows / elapsed) if elapsed > 0 else None
+        }
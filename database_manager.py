@@ -1,44 +1,372 @@
 import sqlite3
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+import itertools
 import json
 import os
+import re
+import threading
+import time
+from pathlib import Path
+from dateutil.tz import tzlocal
+from sqlite_writer import SQLiteWriteQueue, apply_pragmas
+from log_sink import BufferedLogSink
+from data_exporter import export_chunks
+from cold_archive import ColdArchive
+from sqlite_backup import BackupScheduler
+from retention_worker import RetentionWorker
+from query_cache import QueryCache, cached_read
+from hot_tier import HotTier
+from network_rollups import ROLLUP_TABLES, DIMENSIONS, MS_PER_MINUTE, MS_PER_HOUR, compute_rollups, estimate_distinct, sketch_or
+
+MS_PER_DAY = 24 * MS_PER_HOUR
+
+def now_ms():
+    """Instant courant en millisecondes epoch (UTC)"""
+    return int(time.time() * 1000)
+
+def epoch_ms(value=None):
+    """Convertit une date (naïve = heure locale, comme datetime.now()) en millisecondes epoch"""
+    if value is None:
+        return now_ms()
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if not isinstance(value, datetime):
+        # Chaînes, dates (datetime.date), datetime64 numpy
+        value = pd.Timestamp(value)
+    if isinstance(value, pd.Timestamp):
+        # pd.Timestamp.timestamp() considère une date naïve comme UTC, datetime comme locale
+        value = value.to_pydatetime()
+    return int(value.timestamp() * 1000)
+
+def to_epoch_ms(values):
+    """Version vectorisée d'epoch_ms pour une colonne de dates (Series Int64, <NA> si invalide)"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_integer_dtype(series):
+        # Déjà en millisecondes epoch: ni analyse ni fuseau
+        return series.astype('Int64')
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        series = pd.to_datetime(series, errors='coerce', format='mixed')
+    if series.dt.tz is None:
+        # Seules les dates naïves sont rattachées à l'heure locale
+        series = series.dt.tz_localize(tzlocal(), ambiguous=False, nonexistent='shift_forward')
+    # asi8 d'un index avec fuseau est déjà exprimé en UTC
+    index = pd.DatetimeIndex(series).as_unit('ns')
+    return pd.Series(pd.arrays.IntegerArray(index.asi8 // 1_000_000, index.isna()), index=series.index)
 
 class DatabaseManager:
     """Gestionnaire de base de données pour AEGISLAN"""
     
-    def __init__(self, db_path="aegislan_production.db"):
+    # Requêtes des chemins chauds: texte SQL constant pour profiter du cache
+    # de requêtes préparées de chaque connexion
+    INSERT_ANOMALY_SQL = '''
+        INSERT INTO anomalies 
+        (timestamp, ts, device_id, anomaly_type, severity, anomaly_score, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_ALERT_SQL = '''
+        INSERT INTO alerts 
+        (timestamp, ts, alert_type, severity, title, description, device_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+    INSERT_SYSTEM_LOG_SQL = '''
+        INSERT INTO system_logs (timestamp, ts, log_level, component, message, details)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    
+    # Tables horodatées par la colonne ts (millisecondes epoch UTC). Le booléen indique si
+    # la colonne texte timestamp historique est en UTC (CURRENT_TIMESTAMP) plutôt qu'en heure locale
+    TIMESTAMPED_TABLES = {
+        'network_data': False,
+        'anomalies': False,
+        'alerts': False,
+        'system_logs': True
+    }
+    
+    # Valeurs par défaut des colonnes absentes lors d'une insertion réseau
+    NETWORK_DATA_DEFAULTS = {
+        'mac_address': '',
+        'device_type': 'unknown',
+        'port': 0,
+        'protocol': 'unknown',
+        'data_volume_mb': 0,
+        'is_anomaly': 0
+    }
+    TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+    
+    # Mise à jour incrémentale des agrégats (network_rollup_minute / network_rollup_hour)
+    ROLLUP_UPSERT_SQL = '''
+        INSERT INTO {table} 
+        (bucket_ts, dimension, key, connections, volume_sum, volume_max, anomaly_count, port_sketch, protocol_sketch)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (dimension, key, bucket_ts) DO UPDATE SET
+            connections = connections + excluded.connections,
+            volume_sum = volume_sum + excluded.volume_sum,
+            volume_max = MAX(volume_max, excluded.volume_max),
+            anomaly_count = anomaly_count + excluded.anomaly_count,
+            port_sketch = sketch_or(port_sketch, excluded.port_sketch),
+            protocol_sketch = protocol_sketch | excluded.protocol_sketch
+    '''
+    
+    # Schéma de network_data, partagé par la table principale et ses shards
+    NETWORK_DATA_DDL = '''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            ts INTEGER NOT NULL,
+            device_id TEXT NOT NULL,
+            ip_address TEXT NOT NULL,
+            mac_address TEXT,
+            device_type TEXT,
+            port INTEGER,
+            protocol TEXT,
+            data_volume_mb REAL,
+            connection_duration INTEGER,
+            is_anomaly BOOLEAN DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    '''
+    
+    # Partitionnement de network_data: durée couverte par un shard et suffixe de son nom (UTC)
+    PARTITION_SPANS = {
+        'day': (MS_PER_DAY, '%Y%m%d'),
+        'hour': (MS_PER_HOUR, '%Y%m%d%H')
+    }
+    # Plage d'identifiants réservée à chaque shard (id = numéro de période * SHARD_ID_SPAN + n):
+    # les id restent uniques et croissants dans le temps d'un shard à l'autre
+    SHARD_ID_SPAN = 10 ** 10
+    
+    # Durée maximale d'une chronologie servie à la minute; au-delà, l'historique horaire
+    TIMELINE_MINUTE_RANGE = 2 * MS_PER_DAY
+    
+    # Table écrite par une requête INSERT, UPDATE ou DELETE (invalidation du cache de lectures)
+    WRITTEN_TABLE_RE = re.compile(r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(\w+)',
+                                  re.IGNORECASE)
+    
+    def __init__(self, db_path="aegislan_production.db", cached_statements=256, use_write_queue=False,
+                 write_queue_options=None, partition=None, log_buffer_options=None, archive_dir=None,
+                 history_days=365, query_cache_size=256, use_hot_tier=False, hot_tier_options=None):
+        """
+        Args:
+            db_path: Fichier de base SQLite
+            cached_statements: Taille du cache de requêtes préparées de chaque connexion
+            use_write_queue: Si True, toutes les écritures passent par le thread d'écriture
+                             unique du fichier (group commit, asynchrone)
+            write_queue_options: Options de SQLiteWriteQueue (max_queue, batch_rows, flush_interval)
+            partition: 'day' ou 'hour' pour répartir network_data en tables par période
+                       (shards), None pour une table unique
+            log_buffer_options: Options du BufferedLogSink des événements système
+                                (max_buffer, batch_size, flush_interval)
+            archive_dir: Répertoire de l'archive froide de network_data (segments colonnaires),
+                         None pour supprimer les données expirées sans les archiver
+            history_days: Conservation de l'historique horaire (network_rollup_hour), au-delà
+                          de la rétention des données brutes
+            query_cache_size: Nombre de résultats de lecture gardés en cache jusqu'à la
+                              prochaine écriture des tables lues (0 pour désactiver)
+            use_hot_tier: Si True, la fenêtre récente de network_data et d'anomalies est
+                          tenue en mémoire et recopiée périodiquement sur disque (HotTier);
+                          réservé au gestionnaire qui collecte
+            hot_tier_options: Options de HotTier (window, flush_interval)
+        """
+        if partition is not None and partition not in self.PARTITION_SPANS:
+            raise ValueError(f"Partitionnement inconnu: {partition} (attendu: {', '.join(self.PARTITION_SPANS)})")
         self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.partition = partition
+        self.history_days = history_days
+        # Shards connus de network_data: début de période (ms) -> nom de table
+        self._shards = {}
+        self._shards_lock = threading.Lock()
+        # Une connexion longue durée par thread, ouverte à la première utilisation
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._generation = 0
+        self._table_schemas = {}
+        self.write_queue = None
+        self.archive = ColdArchive(archive_dir) if archive_dir else None
+        self.backup_scheduler = None
+        self.retention_worker = None
+        self.query_cache = QueryCache(query_cache_size) if query_cache_size else None
+        self.hot_tier = None
+        # Les événements système sont écrits par lots en arrière-plan
+        self.log_sink = BufferedLogSink(lambda rows: self._write(self.INSERT_SYSTEM_LOG_SQL, rows),
+                                        name=f"log-sink:{os.path.basename(db_path)}",
+                                        **(log_buffer_options or {}))
         self.init_database()
+        if use_write_queue:
+            self.write_queue = SQLiteWriteQueue.for_database(db_path, **(write_queue_options or {}))
+            self.write_queue.add_commit_listener(self._invalidate)
+        if use_hot_tier:
+            span = self.PARTITION_SPANS[self.partition][0] if self.partition else None
+            self.hot_tier = HotTier(db_path, shard_span=span, shard_id_span=self.SHARD_ID_SPAN,
+                                    shard_for=self._ensure_shard if self.partition else None,
+                                    cached_statements=cached_statements,
+                                    name=f"hot-tier:{os.path.basename(db_path)}",
+                                    **(hot_tier_options or {})).start()
+    
+    def _get_connection(self, read_only=False):
+        """
+        Retourne la connexion du thread courant, sans en ouvrir de nouvelle si elle existe
+        
+        Args:
+            read_only: Connexion de lecture dédiée (file:...?mode=ro), distincte de celle
+                       des écritures. En WAL, chaque requête y lit un instantané: les
+                       lectures analytiques ne bloquent pas les écritures et n'attendent
+                       pas leurs verrous
+        """
+        name = 'read_connection' if read_only else 'connection'
+        conn, generation = getattr(self._local, name, (None, None))
+        if conn is not None and generation == self._generation:
+            return conn
+        
+        if read_only:
+            target = f"{Path(self.db_path).absolute().as_uri()}?mode=ro"
+        else:
+            target = self.db_path
+        conn = apply_pragmas(sqlite3.connect(target, uri=read_only, check_same_thread=False,
+                                             cached_statements=self.cached_statements), wal=False)
+        with self._connections_lock:
+            # Libère les connexions des threads terminés (sessions Streamlit, collecteurs arrêtés)
+            for thread, stale in self._connections:
+                if not thread.is_alive():
+                    stale.close()
+            self._connections = [(thread, c) for thread, c in self._connections if thread.is_alive()]
+            self._connections.append((threading.current_thread(), conn))
+        setattr(self._local, name, (conn, self._generation))
+        return conn
+    
+    def _write(self, sql, rows):
+        """
+        Écrit des lignes via la file d'écriture si elle est active, sinon directement
+        
+        Avec le niveau chaud, les insertions dans network_data et anomalies sont faites
+        en mémoire (HotTier.insert) et recopiées sur disque par lots.
+        """
+        if self.hot_tier is not None and self.hot_tier.insert(sql, rows):
+            self._invalidate([sql])
+            return
+        if self.write_queue is not None:
+            self.write_queue.submit(sql, rows)
+            return
+        
+        conn = self._get_connection()
+        with conn:
+            conn.executemany(sql, rows)
+        self._invalidate([sql])
+    
+    def _invalidate(self, statements=(), tables=()):
+        """
+        Périme les résultats en cache des tables écrites, une fois l'écriture validée
+        
+        Args:
+            statements: Requêtes d'écriture exécutées (la table est lue dans la requête)
+            tables: Tables modifiées par d'autres moyens (DROP, purge, compaction)
+        """
+        if self.query_cache is None:
+            return
+        written = set(tables)
+        for sql in statements:
+            match = self.WRITTEN_TABLE_RE.match(sql)
+            if match:
+                written.add(match.group(1))
+        # Les shards sont lus sous le nom de network_data
+        written = {'network_data' if table.startswith('network_data') else table for table in written}
+        if written:
+            self.query_cache.invalidate(*written)
+    
+    def flush(self):
+        """Attend que les événements en tampon, les écritures en file et le niveau chaud soient écrits sur disque"""
+        self.log_sink.flush()
+        self._flush_hot_tier()
+        if self.write_queue is not None:
+            self.write_queue.flush()
+    
+    def _flush_hot_tier(self):
+        """Recopie le niveau chaud sur disque (avant une lecture qui ne passe que par le disque)"""
+        if self.hot_tier is not None:
+            self.hot_tier.flush(evict=False)
+    
+    def close(self):
+        """Écrit les événements en tampon puis ferme toutes les connexions ouvertes par ce gestionnaire"""
+        if self.backup_scheduler is not None:
+            self.backup_scheduler.release(self._log_backup)
+            self.backup_scheduler = None
+        if self.retention_worker is not None:
+            self.retention_worker.stop()
+            self.retention_worker = None
+        self.log_sink.close()
+        if self.hot_tier is not None:
+            self.hot_tier.close()
+            self.hot_tier = None
+        if self.write_queue is not None:
+            self.write_queue.remove_commit_listener(self._invalidate)
+            self.write_queue.release()
+            self.write_queue = None
+        
+        with self._connections_lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+            # Les threads rouvriront une connexion au prochain appel
+            self._generation += 1
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def init_database(self):
         """Initialise la base de données avec les tables nécessaires"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
+        # Nouvelle base: les pages libérées par la purge pourront être rendues par
+        # PRAGMA incremental_vacuum (sans effet sur une base existante, qui exige un VACUUM)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Mode WAL: les lecteurs ne bloquent plus l'écrivain (réglage persistant du fichier)
+        conn.execute("PRAGMA journal_mode = WAL")
         cursor = conn.cursor()
         
-        # Table pour les données réseau
+        # Table pour les données réseau (données non partitionnées)
+        cursor.execute(self.NETWORK_DATA_DDL.format(table='network_data'))
+        
+        # Registre des shards de network_data (mode partitionné)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS network_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                device_id TEXT NOT NULL,
-                ip_address TEXT NOT NULL,
-                mac_address TEXT,
-                device_type TEXT,
-                port INTEGER,
-                protocol TEXT,
-                data_volume_mb REAL,
-                connection_duration INTEGER,
-                is_anomaly BOOLEAN DEFAULT 0,
+            CREATE TABLE IF NOT EXISTS network_data_shards (
+                name TEXT PRIMARY KEY,
+                start_ts INTEGER NOT NULL,
+                end_ts INTEGER NOT NULL,
                 created_at DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # Agrégats par minute et par heure des données réseau, par appareil, port et protocole
+        existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        rollups_created = not set(ROLLUP_TABLES) <= existing
+        for table in ROLLUP_TABLES:
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    bucket_ts INTEGER NOT NULL,
+                    dimension TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    connections INTEGER NOT NULL,
+                    volume_sum REAL NOT NULL,
+                    volume_max REAL,
+                    anomaly_count INTEGER NOT NULL,
+                    port_sketch BLOB,
+                    protocol_sketch INTEGER,
+                    PRIMARY KEY (dimension, key, bucket_ts)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table}(dimension, bucket_ts)')
+        
         # Table pour les anomalies détectées
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS anomalies (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME NOT NULL,
+                ts INTEGER NOT NULL,
                 device_id TEXT NOT NULL,
                 anomaly_type TEXT NOT NULL,
                 severity TEXT NOT NULL,
@@ -71,6 +399,7 @@ class DatabaseManager:
             CREATE TABLE IF NOT EXISTS system_logs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                ts INTEGER NOT NULL,
                 log_level TEXT NOT NULL,
                 component TEXT NOT NULL,
                 message TEXT NOT NULL,
@@ -78,11 +407,21 @@ class DatabaseManager:
             )
         ''')
         
+        # Progression des tâches de maintenance (purge, compaction): nom -> valeur
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS maintenance_state (
+                name TEXT PRIMARY KEY,
+                value INTEGER,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # Table pour les alertes
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS alerts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME NOT NULL,
+                ts INTEGER NOT NULL,
                 alert_type TEXT NOT NULL,
                 severity TEXT NOT NULL,
                 title TEXT NOT NULL,
@@ -96,197 +435,831 @@ class DatabaseManager:
             )
         ''')
         
-        # Index pour les performances
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_network_timestamp ON network_data(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_network_device ON network_data(device_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_anomalies_timestamp ON anomalies(timestamp)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp)')
+        conn.commit()
+        
+        # Bases existantes: ajout et remplissage de la colonne ts
+        self._migrate_epoch_timestamps(conn)
+        
+        # Index pour les performances: recherches par plages d'entiers sur ts
+        cursor.execute('DROP INDEX IF EXISTS idx_network_timestamp')
+        cursor.execute('DROP INDEX IF EXISTS idx_network_device')
+        cursor.execute('DROP INDEX IF EXISTS idx_anomalies_timestamp')
+        cursor.execute('DROP INDEX IF EXISTS idx_alerts_timestamp')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_network_ts ON network_data(ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_network_device_ts ON network_data(device_id, ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_anomalies_ts ON anomalies(ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_anomalies_device_ts ON anomalies(device_id, ts)')
+        # Filtres statut + fenêtre de get_anomalies, iter_anomalies et get_system_statistics
+        # (retenu par index_advisor: x5 à x12 sur 200k anomalies)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_anomalies_status_ts ON anomalies(status, ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts(ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_system_logs_ts ON system_logs(ts)')
         
         conn.commit()
-        conn.close()
+        
+        # Colonnes de network_data dans l'ordre de la table principale (l'ordre peut
+        # différer dans une base migrée): les unions de shards les listent explicitement
+        self._network_columns = [row[1] for row in conn.execute("PRAGMA table_info(network_data)")]
+        if self.partition:
+            self._load_shards()
+            self._refresh_network_view(conn)
+        
+        # Base existante: les agrégats sont calculés une fois depuis les données brutes
+        if rollups_created:
+            self.rebuild_rollups()
         
         self.log_system_event("INFO", "Database", "Database initialized successfully")
     
-    def insert_network_data(self, data):
-        """Insère des données réseau dans la base"""
-        conn = sqlite3.connect(self.db_path)
+    def _migrate_epoch_timestamps(self, conn):
+        """
+        Ajoute la colonne ts aux tables d'une base antérieure et la remplit depuis timestamp
+        
+        Les dates texte écrites par l'application sont en heure locale, sauf celles de
+        system_logs (CURRENT_TIMESTAMP, en UTC). Une date illisible se rabat sur
+        created_at (heure d'insertion, UTC) ou, à défaut, sur l'heure de la migration.
+        """
+        for table_name, utc_text in self.TIMESTAMPED_TABLES.items():
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+            if 'ts' in columns:
+                continue
+            
+            modifier = "" if utc_text else ", 'utc'"
+            fallbacks = [f"(julianday(timestamp{modifier}) - 2440587.5) * 86400000"]
+            if 'created_at' in columns:
+                fallbacks.append("(julianday(created_at) - 2440587.5) * 86400000")
+            with conn:
+                conn.execute(f"ALTER TABLE {table_name} ADD COLUMN ts INTEGER")
+                conn.execute(f'''
+                    UPDATE {table_name}
+                    SET ts = COALESCE(CAST(ROUND(COALESCE({', '.join(fallbacks)})) AS INTEGER), ?)
+                ''', (now_ms(),))
+            self._table_schemas.pop(table_name, None)
+    
+    def _load_shards(self):
+        """Relit le registre des shards (ils peuvent être créés par un autre processus)"""
+        rows = self._get_connection(read_only=True).execute("SELECT start_ts, name FROM network_data_shards").fetchall()
+        self._shards = dict(rows)
+        return self._shards
+    
+    def _refresh_network_view(self, conn):
+        """Recrée la vue network_data_all, union de la table principale et de tous les shards"""
+        columns = ', '.join(self._network_columns)
+        tables = ['network_data'] + [name for _, name in sorted(self._shards.items())]
+        with conn:
+            conn.execute("DROP VIEW IF EXISTS network_data_all")
+            conn.execute("CREATE VIEW network_data_all AS " +
+                         " UNION ALL ".join(f"SELECT {columns} FROM {table}" for table in tables))
+    
+    def _ensure_shard(self, period):
+        """Retourne le shard d'une période (numéro de jour ou d'heure epoch), en le créant si besoin"""
+        span, suffix = self.PARTITION_SPANS[self.partition]
+        start_ts = period * span
+        name = self._shards.get(start_ts)
+        if name is not None:
+            return name
+        
+        with self._shards_lock:
+            name = self._load_shards().get(start_ts)
+            if name is not None:
+                return name
+            
+            name = f"network_data_{pd.Timestamp(start_ts, unit='ms').strftime(suffix)}"
+            conn = self._get_connection()
+            with conn:
+                conn.execute(self.NETWORK_DATA_DDL.format(table=name))
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_ts ON {name}(ts)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_device_ts ON {name}(device_id, ts)")
+                conn.execute('''
+                    INSERT INTO sqlite_sequence (name, seq)
+                    SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)
+                ''', (name, period * self.SHARD_ID_SPAN, name))
+                conn.execute("INSERT OR IGNORE INTO network_data_shards (name, start_ts, end_ts) VALUES (?, ?, ?)",
+                             (name, start_ts, start_ts + span))
+            self._shards[start_ts] = name
+            self._refresh_network_view(conn)
+            return name
+    
+    def _network_source(self, start_ms=None, end_ms=None):
+        """
+        Clause FROM à utiliser pour lire network_data sur une fenêtre de temps
+        
+        Sans partitionnement, la table elle-même. Sinon, l'union de la table principale
+        et des seuls shards qui recouvrent [start_ms, end_ms]; les conditions de la
+        requête englobante sont propagées par SQLite dans chaque branche de l'union.
+        """
+        if not self.partition:
+            return 'network_data'
+        
+        span, _ = self.PARTITION_SPANS[self.partition]
+        tables = ['network_data'] + [
+            name for start_ts, name in sorted(self._load_shards().items())
+            if (start_ms is None or start_ts + span > start_ms) and (end_ms is None or start_ts <= end_ms)
+        ]
+        columns = ', '.join(self._network_columns)
+        union = ' UNION ALL '.join(f"SELECT {columns} FROM {table}" for table in tables)
+        return f"({union}) AS network_data"
+    
+    def _drop_shards_before(self, cutoff):
+        """
+        Supprime les shards entièrement antérieurs à cutoff (ms); retourne leur nombre
+        
+        Si l'archive froide est active, chaque shard y est copié avant d'être supprimé.
+        """
+        # Les lignes en file pour un shard doivent être écrites avant sa suppression
+        self.flush()
+        span, _ = self.PARTITION_SPANS[self.partition]
+        
+        with self._shards_lock:
+            expired = [(start_ts, name) for start_ts, name in self._load_shards().items()
+                       if start_ts + span <= cutoff]
+            if not expired:
+                return 0
+            
+            if self.archive is not None:
+                for start_ts, name in sorted(expired):
+                    self._archive_rows(name, start_ts + span, delete=False)
+            
+            conn = self._get_connection()
+            with conn:
+                for start_ts, name in expired:
+                    conn.execute(f"DROP TABLE IF EXISTS {name}")
+                    conn.execute("DELETE FROM sqlite_sequence WHERE name = ?", (name,))
+                    conn.execute("DELETE FROM network_data_shards WHERE name = ?", (name,))
+                    del self._shards[start_ts]
+            self._refresh_network_view(conn)
+        self._invalidate(tables=['network_data'])
+        
+        return len(expired)
+    
+    def _archive_rows(self, table, cutoff, delete=True):
+        """
+        Copie dans l'archive froide les lignes d'une table network_data antérieures à cutoff
+        
+        Un segment par jour UTC, lu puis écrit un jour à la fois. Seules les lignes
+        archivées (id jusqu'au plus grand id lu) sont ensuite supprimées de la table.
+        
+        Returns:
+            Nombre de lignes archivées
+        """
+        conn = self._get_connection(read_only=True)
+        first = conn.execute(f"SELECT MIN(ts) FROM {table} WHERE ts < ?", (cutoff,)).fetchone()[0]
+        if first is None:
+            return 0
+        
+        archived = 0
+        last_id = None
+        for day_start in range(first // MS_PER_DAY * MS_PER_DAY, cutoff, MS_PER_DAY):
+            frame = pd.read_sql_query(f"SELECT * FROM {table} WHERE ts >= ? AND ts < ?", conn,
+                                      params=(day_start, min(day_start + MS_PER_DAY, cutoff)))
+            if frame.empty:
+                continue
+            self.archive.write_segment(frame, f"network_data_{pd.Timestamp(day_start, unit='ms'):%Y%m%d}")
+            archived += len(frame)
+            last_id = max(last_id or 0, int(frame['id'].max()))
+        
+        if delete and archived:
+            # Suppression directe, hors file d'écriture: au retour, les lignes archivées ne
+            # sont plus lues sur disque (sinon elles le seraient aussi dans les segments)
+            write_conn = self._get_connection()
+            with write_conn:
+                write_conn.execute(f"DELETE FROM {table} WHERE ts < ? AND id <= ?", (cutoff, last_id))
+            self._invalidate(tables=[table])
+        return archived
+    
+    def archive_old_data(self, days=7):
+        """
+        Déplace les données réseau plus anciennes que days jours vers l'archive froide
+        
+        Les shards expirés sont archivés puis supprimés d'un bloc; les lignes anciennes
+        de la table principale et du shard à cheval sur la limite sont archivées puis
+        supprimées. Les lectures de network_data continuent de les retourner.
+        
+        Returns:
+            Dictionnaire avec le nombre de segments et de lignes archivés et la taille ajoutée
+        """
+        if self.archive is None:
+            raise ValueError("Archive froide non configurée (archive_dir)")
+        
+        return self._archive_before(now_ms() - int(days * MS_PER_DAY))
+    
+    def _archive_before(self, cutoff):
+        """Archive les données réseau antérieures à cutoff (ms); voir archive_old_data"""
+        before = self.archive.get_stats()
+        # Les lignes en file doivent être écrites pour être archivées
+        self.flush()
+        self._compact_before(cutoff)
+        
+        tables = ['network_data']
+        if self.partition:
+            self._drop_shards_before(cutoff)
+            span, _ = self.PARTITION_SPANS[self.partition]
+            boundary = self._shards.get(cutoff // span * span)
+            if boundary:
+                tables.append(boundary)
+        for table in tables:
+            self._archive_rows(table, cutoff)
+        
+        after = self.archive.get_stats()
+        result = {key: after[key] - before[key] for key in ('segments', 'rows', 'bytes')}
+        if result['rows']:
+            self.log_system_event("INFO", "Database",
+                                  f"Archived {result['rows']} network_data rows into {result['segments']} segments",
+                                  result)
+        return result
+    
+    def _archived_network_data(self, start_ms=None, end_ms=None, device_id=None):
+        """Blocs de l'archive froide recouvrant la fenêtre, aux colonnes de network_data"""
+        if self.archive is None:
+            return iter(())
+        return self.archive.iter_frames(start_ms, end_ms, device_id, columns=self._network_columns,
+                                        datetime_format=self.TIMESTAMP_FORMAT)
+    
+    def _read_tiers(self, table, query, params=(), start_ms=None):
+        """
+        Exécute une lecture de network_data ou d'anomalies sur le disque et le niveau chaud
+        
+        Sans niveau chaud, la requête est exécutée sur le disque. Sinon, le niveau chaud
+        répond seul si la fenêtre commence après sa limite (boundary); sinon le disque
+        complète pour ts < boundary. Une recopie survenue entre les deux lectures
+        pourrait compter deux fois des lignes: la lecture est alors recommencée.
+        
+        Args:
+            table: 'network_data' ou 'anomalies'
+            query: Requête dont la clause FROM est {source}
+            params: Paramètres de la requête
+            start_ms: Début de la fenêtre lue (None: sans borne)
+        
+        Returns:
+            Liste de DataFrames, un par niveau interrogé
+        """
+        conn = self._get_connection(read_only=True)
+        disk_source = self._network_source(start_ms) if table == 'network_data' else table
+        if self.hot_tier is None:
+            return [pd.read_sql_query(query.format(source=disk_source), conn, params=params)]
+        
+        while True:
+            hot, boundary, generation = self.hot_tier.read(table, query, params)
+            if start_ms is not None and start_ms >= boundary:
+                return [hot]
+            disk = pd.read_sql_query(query.format(source=f"(SELECT * FROM {disk_source} WHERE ts < {boundary}) AS {table}"),
+                                     conn, params=params)
+            if self.hot_tier.generation == generation:
+                return [disk, hot]
+    
+    def _write_rollups(self, frame):
+        """Ajoute un lot de données réseau (DataFrame ou colonnes, avec ts) aux agrégats par minute et par heure"""
+        for table, rows in compute_rollups(frame).items():
+            self._write(self.ROLLUP_UPSERT_SQL.format(table=table), rows)
+    
+    def rebuild_rollups(self, chunk_rows=200000):
+        """
+        Recalcule les agrégats depuis les données brutes (migration, réparation)
+        
+        L'historique antérieur aux plus anciennes données brutes (déjà purgées) est conservé.
+        """
+        self.flush()
+        conn = self._get_connection()
+        first = conn.execute(f"SELECT MIN(ts) FROM {self._network_source()}").fetchone()[0]
+        if first is None:
+            return
+        with conn:
+            for table in ROLLUP_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE bucket_ts >= ?", (first // MS_PER_HOUR * MS_PER_HOUR,))
+        self._invalidate(tables=ROLLUP_TABLES)
         
+        query = f"SELECT ts, device_id, port, protocol, data_volume_mb, is_anomaly FROM {self._network_source()}"
+        for chunk in pd.read_sql_query(query, self._get_connection(read_only=True), chunksize=chunk_rows):
+            self._write_rollups(chunk)
+        self.flush()
+    
+    def compact_history(self, days=7):
+        """
+        Résume les données réseau plus anciennes que days jours dans l'historique horaire
+        
+        Les heures écoulées depuis le dernier passage (maintenance_state
+        'history:compacted') sont recalculées depuis les lignes brutes et remplacent
+        leurs lignes de network_rollup_hour, qui restent ensuite disponibles
+        history_days jours après la purge ou l'archivage des lignes brutes.
+        
+        Returns:
+            Nombre de lignes brutes résumées
+        """
+        return self._compact_before(now_ms() - int(days * MS_PER_DAY))
+    
+    def _compact_before(self, cutoff):
+        """Compacte les heures complètes antérieures à cutoff (ms); voir compact_history"""
+        end = cutoff // MS_PER_HOUR * MS_PER_HOUR
+        start = self.get_maintenance_state('history:compacted')
+        read_conn = self._get_connection(read_only=True)
+        if start is None:
+            first = read_conn.execute(f"SELECT MIN(ts) FROM {self._network_source(None, end)}").fetchone()[0]
+            if first is None:
+                return 0
+            start = first // MS_PER_HOUR * MS_PER_HOUR
+        
+        # Les agrégats en file sont écrits avant d'être remplacés
+        self.flush()
+        conn = self._get_connection()
+        compacted = 0
+        # Un jour de lignes brutes à la fois
+        for chunk_start in range(start, end, MS_PER_DAY):
+            chunk_end = min(chunk_start + MS_PER_DAY, end)
+            frame = pd.read_sql_query(f'''
+                SELECT ts, device_id, port, protocol, data_volume_mb, is_anomaly
+                FROM {self._network_source(chunk_start, chunk_end - 1)}
+                WHERE ts >= ? AND ts < ?
+            ''', read_conn, params=(chunk_start, chunk_end))
+            
+            if not frame.empty:
+                rows = compute_rollups(frame)['network_rollup_hour']
+                with conn:
+                    conn.execute(f'''
+                        DELETE FROM network_rollup_hour
+                        WHERE dimension IN ({', '.join('?' * len(DIMENSIONS))}) AND bucket_ts >= ? AND bucket_ts < ?
+                    ''', (*DIMENSIONS, chunk_start, chunk_end))
+                    conn.executemany(self.ROLLUP_UPSERT_SQL.format(table='network_rollup_hour'), rows)
+                self._invalidate(tables=['network_rollup_hour'])
+                compacted += len(frame)
+            self.set_maintenance_state('history:compacted', chunk_end)
+        
+        return compacted
+    
+    def get_traffic_timeline(self, start, end=None, device_id=None):
+        """
+        Chronologie du trafic lue dans les agrégats
+        
+        Les fenêtres de moins de TIMELINE_MINUTE_RANGE sont servies à la minute; les
+        plus longues par l'historique horaire, qui couvre aussi les périodes dont les
+        lignes brutes ont été purgées.
+        
+        Args:
+            start: Début de la période (datetime, chaîne ou millisecondes epoch)
+            end: Fin de la période (None: maintenant)
+            device_id: Limite la chronologie à un appareil
+        
+        Returns:
+            DataFrame par intervalle (timestamp local, bucket_ts, connection_count,
+            total_volume, max_volume, anomaly_count, unique_ports); attrs['tier'] vaut
+            'minute' ou 'hour'
+        """
+        start_ms = epoch_ms(start)
+        end_ms = epoch_ms(end) if end is not None else now_ms()
+        tier = 'minute' if end_ms - start_ms <= self.TIMELINE_MINUTE_RANGE else 'hour'
+        # Bornes ramenées au début de leur intervalle (même résultat): les appels
+        # successifs (datetime.now() - ...) partagent la même clé de cache
+        bucket = ROLLUP_TABLES[f"network_rollup_{tier}"]
+        return self._traffic_timeline(tier, start_ms // bucket * bucket, end_ms // bucket * bucket, device_id)
+    
+    @cached_read(*ROLLUP_TABLES)
+    def _traffic_timeline(self, tier, first_bucket, last_bucket, device_id=None):
+        """Chronologie des intervalles [first_bucket, last_bucket] d'un niveau d'agrégats (voir get_traffic_timeline)"""
+        table = f"network_rollup_{tier}"
+        conn = self._get_connection(read_only=True)
+        
+        key_filter = ' AND key = ?' if device_id is not None else ''
+        key_params = [str(device_id)] if device_id is not None else []
+        timeline = pd.read_sql_query(f'''
+            SELECT bucket_ts, SUM(connections) AS connection_count, SUM(volume_sum) AS total_volume,
+                   MAX(volume_max) AS max_volume, SUM(anomaly_count) AS anomaly_count
+            FROM {table}
+            WHERE dimension = 'device'{key_filter} AND bucket_ts >= ? AND bucket_ts <= ?
+            GROUP BY bucket_ts
+            ORDER BY bucket_ts
+        ''', conn, params=[*key_params, first_bucket, last_bucket])
+        
+        # Ports distincts: exacts sur toutes les machines (clés de la dimension port),
+        # estimés par l'esquisse pour un appareil
+        if device_id is None:
+            ports = dict(conn.execute(f'''
+                SELECT bucket_ts, COUNT(*) FROM {table}
+                WHERE dimension = 'port' AND bucket_ts >= ? AND bucket_ts <= ?
+                GROUP BY bucket_ts
+            ''', (first_bucket, last_bucket)).fetchall())
+        else:
+            ports = {bucket_ts: estimate_distinct(sketch) for bucket_ts, sketch in conn.execute(f'''
+                SELECT bucket_ts, port_sketch FROM {table}
+                WHERE dimension = 'device' AND key = ? AND bucket_ts >= ? AND bucket_ts <= ?
+            ''', (str(device_id), first_bucket, last_bucket)).fetchall()}
+        timeline['unique_ports'] = timeline['bucket_ts'].map(ports).fillna(0).astype(int)
+        
+        timeline.insert(0, 'timestamp', pd.to_datetime(timeline['bucket_ts'], unit='ms', utc=True)
+                        .dt.tz_convert(tzlocal()).dt.tz_localize(None))
+        timeline.attrs['tier'] = tier
+        return timeline
+    
+    def _rollup_source(self, since, dimension, key=None):
+        """
+        Lignes d'agrégats couvrant les données postérieures à since (ms), à la minute près
+        
+        Les heures complètes sont lues dans network_rollup_hour, les minutes du début
+        et de l'heure en cours dans network_rollup_minute: le nombre de lignes lues ne
+        dépend que de la durée de la fenêtre et du nombre de clés.
+        
+        Returns:
+            Tuple (clause FROM, paramètres)
+        """
+        first_minute = since // MS_PER_MINUTE * MS_PER_MINUTE
+        hours_start = -(-since // MS_PER_HOUR) * MS_PER_HOUR
+        hours_end = max(now_ms() // MS_PER_HOUR * MS_PER_HOUR, hours_start)
+        key_filter = ' AND key = ?' if key is not None else ''
+        key_params = [key] if key is not None else []
+        
+        source = f'''(
+            SELECT * FROM network_rollup_hour
+            WHERE dimension = ?{key_filter} AND bucket_ts >= ? AND bucket_ts < ?
+            UNION ALL
+            SELECT * FROM network_rollup_minute
+            WHERE dimension = ?{key_filter} AND bucket_ts >= ? AND bucket_ts < ?
+            UNION ALL
+            SELECT * FROM network_rollup_minute
+            WHERE dimension = ?{key_filter} AND bucket_ts >= ?
+        )'''
+        params = [dimension, *key_params, hours_start, hours_end,
+                  dimension, *key_params, first_minute, hours_start,
+                  dimension, *key_params, hours_end]
+        return source, params
+    
+    def insert_network_data(self, data):
+        """Insère des données réseau dans la base (enregistrement unique ou lot)"""
+        return self.bulk_insert_network_data(data)['rows']
+    
+    def _table_schema(self, table_name):
+        """Colonnes insérables d'une table (hors clé primaire et colonnes horodatées par défaut)"""
+        if table_name not in self._table_schemas:
+            info = self._get_connection(read_only=True).execute(f"PRAGMA table_info({table_name})").fetchall()
+            self._table_schemas[table_name] = [
+                (name, (col_type or '').upper(), bool(notnull), default)
+                for _, name, col_type, notnull, default, pk in info
+                if not pk and default != 'CURRENT_TIMESTAMP'
+            ]
+        return self._table_schemas[table_name]
+    
+    def _to_frame(self, data):
+        """Accepte DataFrame, liste de dictionnaires, dictionnaire de colonnes ou enregistrement unique"""
         if isinstance(data, pd.DataFrame):
-            data.to_sql('network_data', conn, if_exists='append', index=False)
+            return data
+        if isinstance(data, dict):
+            is_columnar = any(isinstance(v, (list, tuple, np.ndarray, pd.Series)) for v in data.values())
+            return pd.DataFrame(data) if is_columnar else pd.DataFrame([data])
+        return pd.DataFrame(list(data))
+    
+    def _project_to_schema(self, frame, table_name, defaults):
+        """
+        Projette un DataFrame sur les colonnes d'une table et convertit les types
+        
+        Returns:
+            Tuple (colonnes, valeurs par colonne en listes Python prêtes pour sqlite3)
+        """
+        columns = []
+        values = []
+        
+        # Date de référence de chaque ligne: texte lisible dans timestamp, epoch ms dans ts
+        if 'timestamp' in frame.columns:
+            timestamps = frame['timestamp']
+            # Date absente ou illisible: heure d'insertion, ts n'est jamais NULL
+            if pd.api.types.is_integer_dtype(timestamps):
+                # Millisecondes epoch: ts tel quel, heure locale pour la colonne texte
+                epochs = timestamps.astype('Int64')
+                if epochs.hasnans:
+                    epochs = epochs.fillna(now_ms())
+                timestamps = (pd.to_datetime(epochs.astype('int64'), unit='ms', utc=True)
+                              .dt.tz_convert(tzlocal()).dt.tz_localize(None))
+            else:
+                if not pd.api.types.is_datetime64_any_dtype(timestamps):
+                    timestamps = pd.to_datetime(timestamps, errors='coerce', format='mixed')
+                if timestamps.hasnans:
+                    timestamps = timestamps.fillna(pd.Timestamp.now(tz=timestamps.dt.tz))
+                epochs = to_epoch_ms(timestamps)
         else:
-            # Données individuelles
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO network_data 
-                (timestamp, device_id, ip_address, mac_address, device_type, port, protocol, data_volume_mb, is_anomaly)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                data.get('timestamp', datetime.now()),
-                data['device_id'],
-                data['ip_address'],
-                data.get('mac_address', ''),
-                data.get('device_type', 'unknown'),
-                data.get('port', 0),
-                data.get('protocol', 'unknown'),
-                data.get('data_volume_mb', 0),
-                data.get('is_anomaly', False)
-            ))
-            conn.commit()
-        
-        conn.close()
+            timestamps = pd.Series(pd.Timestamp(datetime.now()), index=frame.index)
+            epochs = to_epoch_ms(timestamps)
+        
+        for name, col_type, notnull, _ in self._table_schema(table_name):
+            if name == 'timestamp':
+                series = timestamps.dt.strftime(self.TIMESTAMP_FORMAT)
+            elif name == 'ts':
+                series = epochs
+            elif name in frame.columns:
+                series = frame[name]
+            elif name in defaults:
+                series = pd.Series(defaults[name], index=frame.index)
+            elif notnull:
+                raise ValueError(f"Colonne obligatoire absente pour {table_name}: {name}")
+            else:
+                continue
+            
+            if name in defaults and series.hasnans:
+                series = series.fillna(defaults[name])
+            
+            # Les colonnes déjà au bon type ne sont pas reconverties (coût fixe par colonne
+            # dominant pour les petits lots)
+            if name in ('timestamp', 'ts'):
+                pass
+            elif col_type in ('DATETIME', 'TIMESTAMP'):
+                if not pd.api.types.is_datetime64_any_dtype(series):
+                    series = pd.to_datetime(series, errors='coerce', format='mixed')
+                series = series.dt.strftime(self.TIMESTAMP_FORMAT)
+            elif col_type in ('INTEGER', 'BOOLEAN'):
+                if not (pd.api.types.is_integer_dtype(series) or pd.api.types.is_bool_dtype(series)):
+                    series = pd.to_numeric(series, errors='coerce').round()
+                series = series.astype('Int64')
+            elif col_type == 'REAL':
+                if not pd.api.types.is_float_dtype(series):
+                    series = pd.to_numeric(series, errors='coerce').astype(float)
+            elif not pd.api.types.is_string_dtype(series):
+                series = series.where(series.isna(), series.astype(str))
+            
+            columns.append(name)
+            if series.hasnans:
+                values.append(series.astype(object).where(series.notna(), None).tolist())
+            else:
+                values.append(series.tolist())
+        
+        return columns, values
+    
+    def bulk_insert_network_data(self, data, batch_size=50000):
+        """
+        Insertion en masse de données réseau, projetées sur le schéma de network_data
+        
+        Les colonnes inconnues de la table (features du simulateur, étiquettes...) sont
+        ignorées, les types sont convertis colonne par colonne, puis les lignes sont
+        insérées par executemany dans des transactions de batch_size lignes.
+        
+        Args:
+            data: DataFrame, liste de dictionnaires, dictionnaire de colonnes ou enregistrement unique
+            batch_size: Nombre de lignes par transaction
+        
+        Returns:
+            Dictionnaire avec le nombre de lignes, la durée et le débit (lignes/s)
+        """
+        started = time.perf_counter()
+        frame = self._to_frame(data)
+        
+        if frame.empty:
+            return {'rows': 0, 'seconds': 0.0, 'rows_per_sec': None}
+        
+        columns, values = self._project_to_schema(frame, 'network_data', self.NETWORK_DATA_DEFAULTS)
+        rows = list(zip(*values))
+        
+        if self.partition and self.hot_tier is None:
+            # Répartition par période; les lignes sans date restent dans la table principale
+            # (avec le niveau chaud, elle est faite à la recopie sur disque)
+            span, _ = self.PARTITION_SPANS[self.partition]
+            periods = (pd.array(values[columns.index('ts')], dtype='Int64') // span).fillna(-1).to_numpy(dtype=np.int64)
+            targets = []
+            for period in np.unique(periods):
+                table = self._ensure_shard(int(period)) if period >= 0 else 'network_data'
+                targets.append((table, [rows[i] for i in np.flatnonzero(periods == period)]))
+        else:
+            targets = [('network_data', rows)]
+        
+        for table, table_rows in targets:
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            for offset in range(0, len(table_rows), batch_size):
+                self._write(sql, table_rows[offset:offset + batch_size])
+        
+        # Agrégats mis à jour avec le lot (même file d'écriture, à la suite des lignes brutes)
+        self._write_rollups({
+            name: values[columns.index(name)]
+            for name in ('ts', 'device_id', 'port', 'protocol', 'data_volume_mb', 'is_anomaly')
+        })
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'rows': len(rows),
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(len(rows) / elapsed) if elapsed > 0 else None
+        }
     
     def insert_anomaly(self, anomaly_data):
         """Insère une anomalie détectée"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO anomalies 
-            (timestamp, device_id, anomaly_type, severity, anomaly_score, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            anomaly_data['timestamp'],
+        self._write(self.INSERT_ANOMALY_SQL, [(
+            str(anomaly_data['timestamp']),
+            epoch_ms(anomaly_data['timestamp']),
             anomaly_data['device_id'],
             anomaly_data.get('anomaly_type', 'behavioral'),
             anomaly_data['severity'],
             anomaly_data['anomaly_score'],
             anomaly_data.get('description', '')
-        ))
-        
-        conn.commit()
-        conn.close()
+        )])
     
+    @cached_read('network_data')
     def get_network_data(self, hours=24, limit=None):
-        """Récupère les données réseau récentes"""
-        conn = sqlite3.connect(self.db_path)
-        
+        """Récupère les données réseau récentes (niveau chaud, disque et segments archivés de la période)"""
+        since = now_ms() - int(hours * MS_PER_HOUR)
         query = '''
-            SELECT * FROM network_data 
-            WHERE timestamp > datetime('now', '-{} hours')
-            ORDER BY timestamp DESC
-        '''.format(hours)
+            SELECT * FROM {source} 
+            WHERE ts > ?
+            ORDER BY ts DESC
+        '''
+        params = [since]
         
         if limit:
-            query += f' LIMIT {limit}'
+            query += ' LIMIT ?'
+            params.append(int(limit))
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        frames = self._read_tiers('network_data', query, params, since + 1)
+        frames += list(self._archived_network_data(since + 1))
+        if len(frames) == 1:
+            return frames[0]
         
-        return df
+        frame = pd.concat(frames, ignore_index=True)
+        frame = frame.sort_values(['ts', 'id'], ascending=False, kind='stable', ignore_index=True)
+        return frame.head(int(limit)) if limit else frame
     
+    @cached_read('anomalies')
     def get_anomalies(self, hours=24, status='active'):
         """Récupère les anomalies récentes"""
-        conn = sqlite3.connect(self.db_path)
-        
         query = '''
-            SELECT * FROM anomalies 
-            WHERE timestamp > datetime('now', '-{} hours')
+            SELECT * FROM {source} 
+            WHERE ts > ?
             AND status = ?
-            ORDER BY timestamp DESC
-        '''.format(hours)
-        
-        df = pd.read_sql_query(query, conn, params=(status,))
-        conn.close()
+            ORDER BY ts DESC
+        '''
         
-        return df
+        since = now_ms() - int(hours * MS_PER_HOUR)
+        frames = self._read_tiers('anomalies', query, (since, status), since + 1)
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True).sort_values(['ts', 'id'], ascending=False, kind='stable',
+                                                                ignore_index=True)
     
+    @cached_read(*ROLLUP_TABLES)
     def get_device_statistics(self, device_id, days=7):
-        """Statistiques pour un appareil spécifique"""
-        conn = sqlite3.connect(self.db_path)
+        """
+        Statistiques pour un appareil spécifique, lues dans les agrégats
         
-        query = '''
-            SELECT 
-                COUNT(*) as total_connections,
-                AVG(data_volume_mb) as avg_volume,
-                MAX(data_volume_mb) as max_volume,
-                COUNT(DISTINCT port) as unique_ports,
-                COUNT(DISTINCT protocol) as unique_protocols,
-                SUM(CASE WHEN is_anomaly = 1 THEN 1 ELSE 0 END) as anomaly_count
-            FROM network_data 
-            WHERE device_id = ?
-            AND timestamp > datetime('now', '-{} days')
-        '''.format(days)
+        unique_ports est estimé par l'esquisse de ports de l'appareil (exact à
+        quelques pourcents près tant que l'appareil utilise moins de ~1000 ports).
+        """
+        conn = self._get_connection(read_only=True)
         
-        cursor = conn.cursor()
-        cursor.execute(query, (device_id,))
-        result = cursor.fetchone()
-        conn.close()
+        source, params = self._rollup_source(now_ms() - int(days * MS_PER_DAY), 'device', str(device_id))
+        rows = conn.execute(f'''
+            SELECT connections, volume_sum, volume_max, anomaly_count, port_sketch, protocol_sketch
+            FROM {source}
+        ''', params).fetchall()
+        
+        total = sum(row[0] for row in rows)
+        port_sketch = None
+        protocol_mask = 0
+        for row in rows:
+            port_sketch = sketch_or(port_sketch, row[4])
+            protocol_mask |= row[5] or 0
         
         return {
-            'total_connections': result[0],
-            'avg_volume': result[1],
-            'max_volume': result[2],
-            'unique_ports': result[3],
-            'unique_protocols': result[4],
-            'anomaly_count': result[5]
+            'total_connections': total,
+            'avg_volume': sum(row[1] for row in rows) / total if total else None,
+            'max_volume': max(row[2] for row in rows) if rows else None,
+            'unique_ports': estimate_distinct(port_sketch),
+            'unique_protocols': bin(protocol_mask).count('1'),
+            'anomaly_count': sum(row[3] for row in rows) if rows else None
         }
     
     def create_alert(self, alert_data):
         """Crée une nouvelle alerte"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO alerts 
-            (timestamp, alert_type, severity, title, description, device_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            alert_data['timestamp'],
+        self._write(self.INSERT_ALERT_SQL, [(
+            str(alert_data['timestamp']),
+            epoch_ms(alert_data['timestamp']),
             alert_data['alert_type'],
             alert_data['severity'],
             alert_data['title'],
             alert_data.get('description', ''),
             alert_data.get('device_id', '')
-        ))
+        )])
+    
+    def _detection_frame(self, detections):
+        """
+        Normalise la sortie d'AnomalyDetector.detect_anomalies (ou des enregistrements
+        d'anomalies) en colonnes timestamp, device_id, anomaly_type, severity,
+        anomaly_score et description
+        """
+        frame = self._to_frame(detections)
+        index = frame.index
         
-        conn.commit()
-        conn.close()
+        def column(name, default=None):
+            return frame[name] if name in frame.columns else pd.Series(default, index=index, dtype=object)
+        
+        # anomaly_type du simulateur vaut 'normal' pour les lignes non étiquetées
+        anomaly_type = column('anomaly_type').replace('normal', None).fillna('behavioral')
+        
+        description = column('description')
+        if 'anomaly_confidence' in frame.columns:
+            confidence = pd.to_numeric(frame['anomaly_confidence'], errors='coerce')
+            generated = 'Confiance ' + confidence.round(2).astype(str)
+            if 'port' in frame.columns and 'protocol' in frame.columns:
+                generated += ', port ' + frame['port'].astype(str) + '/' + frame['protocol'].astype(str)
+            if 'data_volume_mb' in frame.columns:
+                generated += ', ' + pd.to_numeric(frame['data_volume_mb'], errors='coerce').round(2).astype(str) + ' MB'
+            description = description.fillna(generated)
+        
+        return pd.DataFrame({
+            'timestamp': column('timestamp', pd.Timestamp(datetime.now())),
+            'device_id': column('device_id'),
+            'anomaly_type': anomaly_type,
+            'severity': column('severity', 'Moyen').fillna('Moyen'),
+            'anomaly_score': column('anomaly_score'),
+            'description': description.fillna('')
+        }, index=index)
     
-    def log_system_event(self, level, component, message, details=None):
-        """Enregistre un événement système"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def insert_anomalies(self, detections):
+        """
+        Insère en une transaction les anomalies retournées par detect_anomalies
         
-        cursor.execute('''
-            INSERT INTO system_logs (log_level, component, message, details)
-            VALUES (?, ?, ?, ?)
-        ''', (level, component, message, json.dumps(details) if details else None))
+        Args:
+            detections: DataFrame de detect_anomalies (anomaly_score, severity,
+                        anomaly_confidence, anomaly_type...) ou liste d'enregistrements
         
-        conn.commit()
-        conn.close()
+        Returns:
+            Nombre d'anomalies insérées
+        """
+        frame = self._detection_frame(detections)
+        if frame.empty:
+            return 0
+        
+        columns, values = self._project_to_schema(frame, 'anomalies', {})
+        self._write(f"INSERT INTO anomalies ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    list(zip(*values)))
+        return len(frame)
+    
+    def create_alerts(self, detections, alert_type='anomaly_detected'):
+        """
+        Crée en une transaction une alerte par anomalie détectée
+        
+        Args:
+            detections: DataFrame de detect_anomalies ou liste d'enregistrements; des
+                        colonnes title / alert_type éventuelles sont conservées
+            alert_type: Type d'alerte des lignes qui n'en précisent pas
+        
+        Returns:
+            Nombre d'alertes créées
+        """
+        source = self._to_frame(detections)
+        frame = self._detection_frame(source)
+        if frame.empty:
+            return 0
+        
+        generated_titles = 'Anomalie ' + frame['severity'].astype(str) + ' - ' + frame['device_id'].astype(str)
+        frame['title'] = source['title'].fillna(generated_titles) if 'title' in source.columns else generated_titles
+        frame['alert_type'] = source['alert_type'].fillna(alert_type) if 'alert_type' in source.columns else alert_type
+        frame['description'] = frame['anomaly_type'] + ': ' + frame['description']
+        
+        columns, values = self._project_to_schema(frame, 'alerts', {})
+        self._write(f"INSERT INTO alerts ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    list(zip(*values)))
+        return len(frame)
+    
+    def log_system_event(self, level, component, message, details=None):
+        """
+        Enregistre un événement système (non bloquant: mis en tampon puis écrit par lots)
+        
+        Returns:
+            False si l'événement a été abandonné parce que le tampon est plein
+        """
+        now = time.time()
+        return self.log_sink.log((
+            time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now)),  # Même format UTC que CURRENT_TIMESTAMP
+            int(now * 1000),
+            level,
+            component,
+            message,
+            json.dumps(details) if details else None
+        ))
     
+    @cached_read(*ROLLUP_TABLES, 'anomalies')
     def get_system_statistics(self):
         """Statistiques générales du système"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection(read_only=True)
         cursor = conn.cursor()
+        since = now_ms() - 24 * MS_PER_HOUR
         
-        # Statistiques réseau
-        cursor.execute('''
+        # Statistiques réseau, lues dans les agrégats par appareil et par port
+        device_source, device_params = self._rollup_source(since, 'device')
+        port_source, port_params = self._rollup_source(since, 'port')
+        cursor.execute(f'''
             SELECT 
-                COUNT(*) as total_connections,
-                COUNT(DISTINCT device_id) as unique_devices,
-                SUM(data_volume_mb) as total_volume,
-                COUNT(DISTINCT port) as unique_ports
-            FROM network_data 
-            WHERE timestamp > datetime('now', '-24 hours')
-        ''')
+                COALESCE(SUM(connections), 0) as total_connections,
+                COUNT(DISTINCT key) as unique_devices,
+                SUM(volume_sum) as total_volume,
+                (SELECT COUNT(DISTINCT key) FROM {port_source}) as unique_ports
+            FROM {device_source}
+        ''', port_params + device_params)
         network_stats = cursor.fetchone()
         
-        # Statistiques anomalies
-        cursor.execute('''
+        cursor.close()
+        
+        # Statistiques anomalies (comptes additionnés sur le disque et le niveau chaud)
+        anomaly_stats = pd.concat(self._read_tiers('anomalies', '''
             SELECT 
                 COUNT(*) as total_anomalies,
                 COUNT(CASE WHEN severity = 'Critique' THEN 1 END) as critical_count,
                 COUNT(CASE WHEN severity = 'Élevé' THEN 1 END) as high_count,
                 COUNT(CASE WHEN severity = 'Moyen' THEN 1 END) as medium_count,
                 COUNT(CASE WHEN severity = 'Faible' THEN 1 END) as low_count
-            FROM anomalies 
-            WHERE timestamp > datetime('now', '-24 hours')
+            FROM {source} 
+            WHERE ts > ?
             AND status = 'active'
-        ''')
-        anomaly_stats = cursor.fetchone()
-        
-        conn.close()
+        ''', (since,), since + 1)).sum().astype(int).tolist()
         
         return {
             'network': {
@@ -305,44 +1278,334 @@ class DatabaseManager:
         }
     
     def cleanup_old_data(self, days=30):
-        """Nettoie les anciennes données"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Nettoie les anciennes données, par petits lots (voir RetentionWorker)"""
+        deleted = RetentionWorker(self, days, max_rows_per_second=None).run_once()
+        self.log_system_event("INFO", "Database", f"Cleaned up data older than {days} days", deleted)
+    
+    def retention_tables(self, cutoff):
+        """
+        Tables purgées par RetentionWorker pour une limite cutoff (ms)
         
-        # Supprimer les données réseau anciennes
-        cursor.execute('''
-            DELETE FROM network_data 
-            WHERE timestamp < datetime('now', '-{} days')
-        '''.format(days))
+        Les données réseau expirées sont d'abord résumées dans l'historique horaire,
+        puis déplacées dans l'archive froide si elle est active.
+        En mode partitionné, les shards entièrement expirés sont supprimés d'un bloc
+        et seul le shard à cheval sur la limite est purgé par lots.
+        """
+        # L'historique horaire est complété avant que les lignes brutes ne disparaissent
+        self._compact_before(cutoff)
+        if self.archive is not None:
+            self._archive_before(cutoff)
         
-        # Supprimer les logs anciens
-        cursor.execute('''
-            DELETE FROM system_logs 
-            WHERE timestamp < datetime('now', '-{} days')
-        '''.format(days))
+        tables = ['network_data']
+        if self.partition:
+            dropped = self._drop_shards_before(cutoff)
+            if dropped:
+                self.log_system_event("INFO", "Database", f"Dropped {dropped} expired network_data shards")
+            span, _ = self.PARTITION_SPANS[self.partition]
+            boundary = self._shards.get(cutoff // span * span)
+            if boundary:
+                tables.append(boundary)
+        return tables + ['system_logs', *ROLLUP_TABLES]
+    
+    def purge_batch(self, table, cutoff, after_id, batch_rows):
+        """
+        Supprime les lignes expirées (ts < cutoff) de la prochaine plage d'identifiants après after_id
         
-        conn.commit()
-        conn.close()
+        La plage commence à la première ligne expirée au-delà de after_id (les plages
+        sans ligne expirée sont sautées, les lignes anciennes pouvant avoir des
+        identifiants récents: imports, rattrapages) et couvre batch_rows identifiants
+        de la clé primaire: une transaction ne touche jamais plus de batch_rows lignes.
+        Les tables d'agrégats (sans rowid) sont purgées par lots de batch_rows via
+        l'index (dimension, bucket_ts).
+        
+        Returns:
+            Tuple (lignes supprimées, identifiant de reprise), l'identifiant étant None
+            quand plus aucune ligne expirée ne suit after_id
+        """
+        conn = self._get_connection()
+        if table in ROLLUP_TABLES:
+            if table == 'network_rollup_hour':
+                # L'historique horaire survit aux données brutes
+                cutoff = min(cutoff, now_ms() - int(self.history_days * MS_PER_DAY))
+            with conn:
+                deleted = conn.execute(f'''
+                    DELETE FROM {table} WHERE (dimension, key, bucket_ts) IN (
+                        SELECT dimension, key, bucket_ts FROM {table}
+                        WHERE dimension IN ({', '.join('?' * len(DIMENSIONS))}) AND bucket_ts < ?
+                        LIMIT ?
+                    )
+                ''', (*DIMENSIONS, cutoff, batch_rows)).rowcount
+            self._invalidate(tables=[table])
+            return deleted, 0 if deleted else None
+        
+        first_id = conn.execute(f"SELECT MIN(id) FROM {table} WHERE id > ? AND ts < ?",
+                                (after_id, cutoff)).fetchone()[0]
+        if first_id is None:
+            return 0, None
+        last_id = conn.execute(f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id >= ? ORDER BY id LIMIT ?)",
+                               (first_id, batch_rows)).fetchone()[0]
+        
+        with conn:
+            deleted = conn.execute(f"DELETE FROM {table} WHERE id >= ? AND id <= ? AND ts < ?",
+                                   (first_id, last_id, cutoff)).rowcount
+        self._invalidate(tables=[table])
+        return deleted, last_id
+    
+    def get_maintenance_state(self, name, default=None):
+        """Valeur enregistrée d'une tâche de maintenance (default si absente)"""
+        row = self._get_connection().execute("SELECT value FROM maintenance_state WHERE name = ?",
+                                             (name,)).fetchone()
+        return row[0] if row else default
+    
+    def set_maintenance_state(self, name, value):
+        conn = self._get_connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO maintenance_state (name, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            ''', (name, value))
+    
+    def reclaim_space(self, pages=1000):
+        """Rend au système jusqu'à pages pages libres (auto_vacuum incrémental) et reporte le WAL dans la base"""
+        conn = self._get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+    
+    def start_retention_worker(self, days=30, **options):
+        """Lance la purge continue en arrière-plan (arrêtée par close()); options de RetentionWorker"""
+        if self.retention_worker is None:
+            self.retention_worker = RetentionWorker(
+                self, days, name=f"retention:{os.path.basename(self.db_path)}", **options).start()
+        return self.retention_worker
+    
+    def export_data(self, table_name, start_date=None, end_date=None, format='csv', compress=False,
+                    chunk_rows=50000, progress_callback=None):
+        """
+        Exporte les données pour analyse externe, en flux (mémoire constante)
+        
+        Même interface que PostgreSQLManager.export_data: les lignes sont lues par pages
+        (pagination par clé) et écrites bloc par bloc via export_to_file; network_data
+        inclut l'archive froide.
+        
+        Args:
+            table_name: Table à exporter
+            start_date, end_date: Bornes incluses de la période exportée
+            format: Format export (csv, json (JSON Lines), parquet)
+            compress: Compression gzip
+            chunk_rows: Nombre de lignes lues et écrites par bloc
+            progress_callback: Fonction appelée après chaque bloc avec (lignes écrites, total)
+        
+        Returns:
+            Chemin du fichier exporté
+        """
+        return self.export_to_file(table_name, format=format, start_date=start_date, end_date=end_date,
+                                   compress=compress, chunk_rows=chunk_rows,
+                                   progress_callback=progress_callback)['path']
+    
+    def _window_conditions(self, start_ms=None, end_ms=None, device_id=None):
+        """Clause WHERE (ou None) et paramètres d'une fenêtre [start_ms, end_ms], éventuellement par appareil"""
+        conditions = []
+        params = []
+        if device_id is not None:
+            conditions.append('device_id = ?')
+            params.append(str(device_id))
+        if start_ms is not None:
+            conditions.append('ts >= ?')
+            params.append(start_ms)
+        if end_ms is not None:
+            conditions.append('ts <= ?')
+            params.append(end_ms)
+        return ' AND '.join(conditions) or None, params
+    
+    def iter_network_data(self, start, end=None, device_id=None, page_size=10000):
+        """
+        Parcourt les données réseau d'une période, page par page dans l'ordre chronologique
+        
+        Les pages sont paginées par clé sur (ts, id): chaque page est une recherche
+        dans l'index (ts) ou (device_id, ts), quelle que soit sa position dans la période.
+        Les lignes de l'archive froide, plus anciennes, sont produites en premier; celles
+        du niveau chaud sont recopiées sur disque avant le parcours.
+        
+        Args:
+            start: Début de la période (datetime, chaîne ou millisecondes epoch)
+            end: Fin incluse de la période (None: jusqu'aux données les plus récentes)
+            device_id: Limite le parcours à un appareil
+            page_size: Nombre maximal de lignes par page
+        
+        Yields:
+            Un DataFrame par page non vide
+        """
+        start_ms = epoch_ms(start)
+        end_ms = epoch_ms(end) if end is not None else None
+        self._flush_hot_tier()
+        for frame in self._archived_network_data(start_ms, end_ms, device_id):
+            for offset in range(0, len(frame), page_size):
+                yield frame.iloc[offset:offset + page_size].reset_index(drop=True)
+        
+        where, params = self._window_conditions(start_ms, end_ms, device_id)
+        for page in self._iter_keyset(self._network_source(start_ms, end_ms), where, params, page_size=page_size):
+            if not page.empty:
+                yield page
+    
+    def iter_anomalies(self, start, end=None, device_id=None, status=None, page_size=10000):
+        """
+        Parcourt les anomalies d'une période, page par page dans l'ordre chronologique
         
-        self.log_system_event("INFO", "Database", f"Cleaned up data older than {days} days")
+        Mêmes paramètres qu'iter_network_data, avec un filtre optionnel sur le statut.
+        """
+        self._flush_hot_tier()
+        where, params = self._window_conditions(epoch_ms(start), epoch_ms(end) if end is not None else None,
+                                                device_id)
+        if status is not None:
+            where = f"{where} AND status = ?"
+            params.append(status)
+        for page in self._iter_keyset('anomalies', where, params, page_size=page_size):
+            if not page.empty:
+                yield page
     
-    def export_data(self, table_name, start_date=None, end_date=None):
-        """Exporte les données pour analyse"""
-        conn = sqlite3.connect(self.db_path)
+    def _iter_keyset(self, source, where=None, params=(), keys=('ts', 'id'), page_size=50000):
+        """
+        Parcourt une table par pages ordonnées sur keys
         
-        if start_date and end_date:
+        Chaque page reprend après la dernière clé lue ((ts, id) > (?, ?)), ce qui se
+        traduit par une recherche dans l'index au lieu d'un OFFSET qui relirait
+        toutes les lignes précédentes. La première page est toujours produite, même
+        vide, pour que l'appelant connaisse les colonnes.
+        
+        Une clé de tête NULL (ts d'une base antérieure) ne peut pas servir de point de
+        reprise: (NULL, id) > (?, ?) n'est jamais vrai et le parcours s'arrêterait en
+        silence. Ces lignes sont parcourues à part sur les clés suivantes, après les
+        autres: le premier bloc non vide fixe ainsi des types complets (schéma parquet).
+        """
+        conditions = [where] if where else []
+        if len(keys) == 1:
+            yield from self._keyset_pages(source, conditions, params, keys, page_size)
+            return
+        
+        passes = [(conditions + [f"{keys[0]} IS NOT NULL"], keys),
+                  (conditions + [f"{keys[0]} IS NULL"], keys[1:])]
+        produced = False
+        for pass_conditions, pass_keys in passes:
+            for page in self._keyset_pages(source, pass_conditions, params, pass_keys, page_size):
+                if page.empty:
+                    empty_page = page
+                    continue
+                produced = True
+                yield page
+        if not produced:
+            yield empty_page
+    
+    def _keyset_pages(self, source, conditions, params, keys, page_size):
+        """Pages d'un parcours par clé (première page produite même vide), voir _iter_keyset"""
+        conn = self._get_connection(read_only=True)
+        key_list = ', '.join(keys)
+        last = None
+        
+        while True:
+            page_conditions = conditions + ([f"({key_list}) > ({', '.join('?' * len(keys))})"] if last else [])
             query = f'''
-                SELECT * FROM {table_name} 
-                WHERE timestamp BETWEEN ? AND ?
-                ORDER BY timestamp
+                SELECT * FROM {source}
+                {'WHERE ' + ' AND '.join(page_conditions) if page_conditions else ''}
+                ORDER BY {key_list}
+                LIMIT ?
             '''
-            df = pd.read_sql_query(query, conn, params=(start_date, end_date))
-        else:
-            query = f'SELECT * FROM {table_name} ORDER BY timestamp'
-            df = pd.read_sql_query(query, conn)
+            page = pd.read_sql_query(query, conn, params=[*params, *(last or ()), page_size])
+            if last is None or not page.empty:
+                yield page
+            if len(page) < page_size:
+                return
+            last = tuple(page[key].iloc[-1].item() for key in keys)
+    
+    def export_to_file(self, table_name, path=None, format='csv', start_date=None, end_date=None,
+                       compress=False, chunk_rows=50000, progress_callback=None):
+        """
+        Exporte une table vers un fichier en flux, bloc par bloc (mémoire constante)
+        
+        Args:
+            table_name: Table à exporter
+            path: Fichier de sortie (par défaut export_<table>_<date>.<format>)
+            format: 'csv', 'jsonl'/'json' ou 'parquet'
+            start_date, end_date: Bornes incluses de la période exportée (tables horodatées)
+            compress: Compression gzip
+            chunk_rows: Nombre de lignes par bloc
+            progress_callback: Fonction appelée après chaque bloc avec (lignes écrites, total)
+        
+        Returns:
+            Dictionnaire avec le chemin, le nombre de lignes et de blocs, la durée et la taille
+        """
+        self._flush_hot_tier()
+        conn = self._get_connection(read_only=True)
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+        keys = ('ts', 'id') if 'ts' in columns else ('id',)
+        
+        start_ms = epoch_ms(start_date) if start_date else None
+        end_ms = epoch_ms(end_date) if end_date else None
+        source = self._network_source(start_ms, end_ms) if table_name == 'network_data' else table_name
+        where, params = self._window_conditions(start_ms, end_ms)
+        
+        total_rows = None
+        if progress_callback:
+            total_rows = conn.execute(
+                f"SELECT COUNT(*) FROM {source}" + (f" WHERE {where}" if where else ""), params
+            ).fetchone()[0]
+            if table_name == 'network_data' and self.archive is not None:
+                # Majorant: lignes des segments recouvrant la période, sans les lire
+                total_rows += sum(segment['rows'] for segment in self.archive.overlapping(start_ms, end_ms))
+        
+        if path is None:
+            path = f"export_{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+        
+        chunks = self._iter_keyset(source, where, params, keys, chunk_rows)
+        if table_name == 'network_data':
+            chunks = itertools.chain(self._archived_network_data(start_ms, end_ms), chunks)
+        return export_chunks(chunks, path, format=format,
+                             compress=compress, progress_callback=progress_callback, total_rows=total_rows)
+    
+    def _log_backup(self, metrics):
+        self.log_system_event("INFO", "Database",
+                              f"Backup written to {metrics['path']} in {metrics['seconds']}s "
+                              f"({metrics['bytes_per_second'] or 0} bytes/s)", metrics)
+    
+    def backup(self, directory="backups", keep=24, compress=True, pages=256, sleep=0.01):
+        """
+        Sauvegarde à chaud de la base (API de sauvegarde incrémentale, sans bloquer la collecte)
+        
+        Args:
+            directory: Répertoire des instantanés
+            keep: Nombre d'instantanés conservés
+            compress: Compression gzip de l'instantané
+            pages, sleep: Pages copiées par étape et pause après chaque étape
+        
+        Returns:
+            Métriques de la sauvegarde (chemin, octets, durée, débit)
+        """
+        # Les lignes en file sont validées pour figurer dans l'instantané
+        self.flush()
+        scheduler = BackupScheduler(self.db_path, directory, keep=keep, compress=compress, pages=pages,
+                                    sleep=sleep, on_backup=self._log_backup)
+        return scheduler.backup_now()
+    
+    def start_backup_schedule(self, interval=3600, directory="backups", keep=24, compress=True, config=None):
+        """
+        Lance les sauvegardes périodiques de la base; retourne le planificateur
+        
+        Le planificateur est partagé par tous les gestionnaires du même fichier et
+        s'arrête à la fermeture (close()) du dernier.
         
-        conn.close()
-        return df
+        Args:
+            config: ProductionConfig dont les réglages db_backup_* remplacent les autres
+                arguments (aucune sauvegarde si db_backup_interval est nul)
+        """
+        if self.backup_scheduler is None:
+            options = {'on_backup': self._log_backup, 'name': f"sqlite-backup:{os.path.basename(self.db_path)}"}
+            if config is not None:
+                self.backup_scheduler = BackupScheduler.from_config(config, db_path=self.db_path, **options)
+            else:
+                self.backup_scheduler = BackupScheduler.for_database(self.db_path, directory=directory,
+                                                                     interval=interval, keep=keep,
+                                                                     compress=compress, **options)
+        return self.backup_scheduler
     
     def get_database_size(self):
         """Taille de la base de données"""
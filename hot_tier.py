@@ -0,0 +1,273 @@
+"""
+Niveau chaud en mémoire pour la base SQLite AEGISLAN
+La fenêtre récente de network_data et d'anomalies est tenue dans une base :memory:
+attachée (ATTACH ... AS hot) à une connexion sur le fichier. Les insertions y sont
+faites en mémoire; un thread recopie périodiquement les nouvelles lignes sur disque
+en une transaction (INSERT ... SELECT), puis retire du niveau chaud celles qui sont
+sorties de la fenêtre.
+
+Le niveau chaud fait autorité pour ts >= boundary (et pour les lignes pas encore
+recopiées), le disque pour ts < boundary: une lecture interroge l'un, l'autre ou les
+deux selon sa fenêtre, sans jamais compter deux fois une ligne.
+
+Le niveau chaud appartient à un seul gestionnaire (le processus de collecte): les
+autres processus voient ses lignes après la recopie suivante, et une interruption
+brutale perd au plus flush_interval secondes d'insertions.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from sqlite_writer import apply_pragmas
+
+class HotTier:
+    """Base :memory: attachée, recopiée sur disque et bornée à une fenêtre récente"""
+
+    TABLES = ('network_data', 'anomalies')
+
+    INSERT_RE = re.compile(r'^\s*INSERT\s+INTO\s+(\w+)', re.IGNORECASE)
+    CREATE_TABLE_RE = re.compile(r'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?', re.IGNORECASE)
+    CREATE_INDEX_RE = re.compile(r'^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?', re.IGNORECASE)
+
+    def __init__(self, db_path, window=3600, flush_interval=5, shard_span=None, shard_id_span=None,
+                 shard_for=None, cached_statements=256, name="hot-tier"):
+        """
+        Args:
+            db_path: Base sur disque (ses tables doivent exister)
+            window: Durée (secondes) des données gardées en mémoire
+            flush_interval: Délai (secondes) entre deux recopies sur disque
+            shard_span, shard_id_span, shard_for: Partitionnement de network_data sur disque
+                (durée d'un shard en ms, plage d'identifiants d'un shard et fonction
+                période -> shard, qui le crée si besoin); None pour la table unique
+            cached_statements: Taille du cache de requêtes préparées de la connexion
+        """
+        self.window_ms = int(window * 1000)
+        self.flush_interval = flush_interval
+        self.shard_span = shard_span
+        self.shard_id_span = shard_id_span
+        self.shard_for = shard_for
+        self.stats = {
+            'rows_written': 0,
+            'flushes': 0,
+            'rows_flushed': 0,
+            'rows_evicted': 0,
+            'errors': 0,
+            'last_flush': None,
+            'last_error': None
+        }
+        # La fenêtre récente est chargée depuis le disque: le niveau chaud fait autorité à partir d'ici
+        self.boundary = int(time.time() * 1000) - self.window_ms
+        # Incrémenté à chaque recopie: une lecture des deux niveaux recommence si elle en chevauche une
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+        self._conn = apply_pragmas(sqlite3.connect(db_path, check_same_thread=False,
+                                                   cached_statements=cached_statements), wal=False)
+        self._conn.execute("ATTACH DATABASE ':memory:' AS hot")
+        self._columns = {}
+        self._persisted = {}
+        with self._conn:
+            for table in self.TABLES:
+                self._create(table)
+
+    def _create(self, table):
+        """Recrée la table et ses index dans hot, y charge la fenêtre récente et reprend la séquence d'identifiants"""
+        conn = self._conn
+        (ddl,) = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                              (table,)).fetchone()
+        conn.execute(self.CREATE_TABLE_RE.sub(f"CREATE TABLE hot.{table}", ddl, count=1))
+        for (ddl,) in conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? "
+                                   "AND sql IS NOT NULL", (table,)).fetchall():
+            conn.execute(self.CREATE_INDEX_RE.sub(lambda m: f"CREATE {m.group(1) or ''}INDEX hot.{m.group(2)}",
+                                                  ddl, count=1))
+        # Identifiants chauds à la suite de ceux du disque (du shard le plus récent en mode
+        # partitionné): ils sont conservés par la recopie
+        sharded = table == 'network_data' and self.shard_for is not None
+        conn.execute(f"INSERT INTO hot.sqlite_sequence (name, seq) SELECT ?, MAX(seq) FROM main.sqlite_sequence "
+                     f"WHERE name = ?{' OR name IN (SELECT name FROM main.network_data_shards)' if sharded else ''} "
+                     f"HAVING MAX(seq) IS NOT NULL", (table, table))
+        self._columns[table] = [row[1] for row in conn.execute(f"PRAGMA hot.table_info({table})")]
+        
+        column_list = ', '.join(self._columns[table])
+        source = 'main.network_data_all' if sharded else f"main.{table}"
+        conn.execute(f"INSERT INTO hot.{table} ({column_list}) SELECT {column_list} FROM {source} WHERE ts >= ?",
+                     (self.boundary,))
+        self._persisted[table] = conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM hot.sqlite_sequence "
+                                              f"WHERE name = ?", (table,)).fetchone()[0]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Arrête la recopie périodique, recopie les dernières lignes et libère la mémoire"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+        self._conn.close()
+
+    def insert(self, sql, rows):
+        """
+        Exécute en mémoire une insertion dans une table du niveau chaud
+
+        Returns:
+            False si la requête n'est pas une insertion dans TABLES (à écrire sur disque)
+        """
+        match = self.INSERT_RE.match(sql)
+        if match is None or match.group(1) not in self.TABLES:
+            return False
+        hot_sql = f"{sql[:match.start(1)]}hot.{sql[match.start(1):]}"
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(hot_sql, rows)
+            self.stats['rows_written'] += len(rows)
+        return True
+
+    def read(self, table, query, params=()):
+        """
+        Exécute query (clause FROM {source}) sur la partie de table dont le niveau chaud fait autorité
+
+        Returns:
+            Tuple (DataFrame, boundary, generation) lus ensemble: le disque complète la
+            lecture pour ts < boundary, tant que generation n'a pas changé
+        """
+        with self._lock:
+            source = (f"(SELECT * FROM hot.{table} WHERE ts >= {self.boundary} "
+                      f"OR id > {self._persisted[table]}) AS {table}")
+            frame = pd.read_sql_query(query.format(source=source), self._conn, params=params)
+            return frame, self.boundary, self.generation
+
+    def _flush_targets(self, table, after_id, last_id):
+        """
+        Destinations sur disque des lignes ]after_id, last_id] de table
+
+        Returns:
+            Liste de (table sur disque, condition SQL, plage d'identifiants [début, fin[
+            de la destination); les shards manquants sont créés ici, avant la transaction
+        """
+        if table != 'network_data' or self.shard_for is None:
+            return [(table, '1', (0, float('inf')))]
+
+        targets = []
+        periods = self._conn.execute(f"SELECT DISTINCT ts / {self.shard_span} FROM hot.network_data "
+                                     f"WHERE id > ? AND id <= ?", (after_id, last_id)).fetchall()
+        for (period,) in periods:
+            if period is None or period < 0:
+                # Lignes sans date: table principale, dont les identifiants ne suivent pas ceux des shards
+                targets.append(('network_data', f"(ts / {self.shard_span}) IS {period}", (0, 0)))
+            else:
+                targets.append((self.shard_for(int(period)), f"ts / {self.shard_span} = {int(period)}",
+                                (period * self.shard_id_span, (period + 1) * self.shard_id_span)))
+        return targets
+
+    def _sequence(self, schema, name):
+        row = self._conn.execute(f"SELECT seq FROM {schema}.sqlite_sequence WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_sequence(self, schema, name, seq):
+        """Avance la séquence AUTOINCREMENT d'une table jusqu'à seq au moins"""
+        if not self._conn.execute(f"UPDATE {schema}.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                                  (seq, name)).rowcount:
+            self._conn.execute(f"INSERT INTO {schema}.sqlite_sequence (name, seq) VALUES (?, ?)", (name, seq))
+
+    def _copy_rows(self, table, after_id, last_id, target, condition, id_range):
+        """
+        Copie des lignes chaudes vers une table du disque (dans la transaction de recopie)
+
+        Les identifiants sont conservés s'ils appartiennent à la plage de la destination et
+        suivent sa séquence. Sinon (autre écrivain, shard d'une autre période), le disque en
+        attribue de nouveaux, après avoir avancé sa séquence au-delà des identifiants chauds
+        de sa plage: une ligne lue dans un niveau n'a jamais l'identifiant d'une ligne lue
+        dans l'autre.
+        """
+        conn = self._conn
+        where = f"id > ? AND id <= ? AND {condition}"
+        low_id, high_id = conn.execute(f"SELECT MIN(id), MAX(id) FROM hot.{table} WHERE {where}",
+                                       (after_id, last_id)).fetchone()
+        if low_id is None:
+            return 0
+
+        columns = self._columns[table]
+        disk_seq = self._sequence('main', target)
+        keep_ids = id_range[0] <= low_id and high_id < id_range[1] and low_id > disk_seq
+        if not keep_ids:
+            columns = [column for column in columns if column != 'id']
+            hot_seq = self._sequence('hot', table)
+            if id_range[0] <= hot_seq < id_range[1]:
+                self._set_sequence('main', target, hot_seq)
+
+        column_list = ', '.join(columns)
+        copied = conn.execute(f"INSERT INTO main.{target} ({column_list}) SELECT {column_list} "
+                              f"FROM hot.{table} WHERE {where} ORDER BY id", (after_id, last_id)).rowcount
+        if not keep_ids:
+            # Les prochains identifiants chauds suivent ceux attribués par le disque
+            self._set_sequence('hot', table, self._sequence('main', target))
+        return copied
+
+    def flush(self, evict=True):
+        """
+        Recopie sur disque, en une transaction, les lignes chaudes qui n'y sont pas encore
+
+        Args:
+            evict: Retirer ensuite de la mémoire les lignes recopiées plus anciennes que la fenêtre
+
+        Returns:
+            Dictionnaire {table: lignes recopiées}
+        """
+        with self._lock:
+            started = time.perf_counter()
+            conn = self._conn
+            pending = {}
+            for table in self.TABLES:
+                last_id = conn.execute(f"SELECT MAX(id) FROM hot.{table}").fetchone()[0]
+                if last_id is not None and last_id > self._persisted[table]:
+                    pending[table] = (self._persisted[table], last_id)
+            targets = {table: self._flush_targets(table, *ids) for table, ids in pending.items()}
+            cutoff = int(time.time() * 1000) - self.window_ms
+
+            flushed = {}
+            evicted = 0
+            with conn:
+                for table, (after_id, last_id) in pending.items():
+                    flushed[table] = sum(self._copy_rows(table, after_id, last_id, *target)
+                                         for target in targets[table])
+                if evict:
+                    for table in self.TABLES:
+                        last_id = pending.get(table, (None, self._persisted[table]))[1]
+                        evicted += conn.execute(f"DELETE FROM hot.{table} WHERE (ts < ? OR ts IS NULL) AND id <= ?",
+                                                (cutoff, last_id)).rowcount
+
+            for table, (_, last_id) in pending.items():
+                self._persisted[table] = last_id
+            if evict:
+                self.boundary = max(self.boundary, cutoff)
+            if pending or evicted:
+                self.generation += 1
+
+            self.stats['flushes'] += 1
+            self.stats['rows_flushed'] += sum(flushed.values())
+            self.stats['rows_evicted'] += evicted
+            self.stats['last_flush'] = {
+                'finished_at': datetime.now().isoformat(),
+                'seconds': round(time.perf_counter() - started, 3),
+                'flushed': flushed,
+                'evicted': evicted
+            }
+            return flushed
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # Les lignes restent en mémoire et sont recopiées à la tentative suivante
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
@@ -0,0 +1,245 @@
+"""
+Conseiller d'index pour la base SQLite AEGISLAN
+Rejoue les lectures du DatabaseManager sur une base synthétique volumineuse, relève
+les requêtes réellement émises (trace SQLite), leur plan (EXPLAIN QUERY PLAN) et leur
+durée, puis mesure l'effet d'index candidats composites, couvrants et partiels.
+
+Usage:
+    python index_advisor.py --db advisor.db --rows 1000000 [--apply]
+
+Pour PostgreSQL, explain_analyze_postgresql() retourne le plan exécuté
+(EXPLAIN ANALYZE) d'une requête du PostgreSQLManager.
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from database_manager import DatabaseManager, to_epoch_ms
+
+# Index candidats: nom -> définition. Chaque candidat est mesuré seul et retenu
+# uniquement si au moins une requête du scénario l'utilise et en tire un gain.
+CANDIDATE_INDEXES = {
+    # get_anomalies / iter_anomalies: statut + fenêtre de temps (composite)
+    'idx_anomalies_status_ts': 'CREATE INDEX IF NOT EXISTS idx_anomalies_status_ts ON anomalies(status, ts)',
+    # get_system_statistics: anomalies actives récentes comptées par sévérité (partiel et couvrant)
+    'idx_anomalies_active_ts_severity': '''
+        CREATE INDEX IF NOT EXISTS idx_anomalies_active_ts_severity ON anomalies(ts, severity)
+        WHERE status = 'active'
+    ''',
+    # export_data / iter sur les alertes ouvertes (partiel)
+    'idx_alerts_open_ts': "CREATE INDEX IF NOT EXISTS idx_alerts_open_ts ON alerts(ts) WHERE status = 'open'",
+    # get_network_data limité: parcours de (ts, id) sans tri (composite)
+    'idx_network_ts_id': 'CREATE INDEX IF NOT EXISTS idx_network_ts_id ON network_data(ts, id)'
+}
+
+# Lectures rejouées: libellé -> appel sur le gestionnaire
+def default_workload(device_id):
+    now = datetime.now()
+    return {
+        'get_network_data(1h)': lambda db: db.get_network_data(hours=1),
+        'get_network_data(24h, 1000)': lambda db: db.get_network_data(hours=24, limit=1000),
+        'get_anomalies(24h, active)': lambda db: db.get_anomalies(hours=24),
+        'get_anomalies(168h, resolved)': lambda db: db.get_anomalies(hours=168, status='resolved'),
+        'get_device_statistics': lambda db: db.get_device_statistics(device_id),
+        'get_system_statistics': lambda db: db.get_system_statistics(),
+        'iter_network_data(device, 1 page)': lambda db: next(iter(db.iter_network_data(
+            now - timedelta(days=2), device_id=device_id, page_size=5000)), None),
+        'iter_anomalies(active, 1 page)': lambda db: next(iter(db.iter_anomalies(
+            now - timedelta(days=7), status='active', page_size=5000)), None),
+        # Export en flux: seules les requêtes comptent, le fichier est supprimé
+        'export_data(alerts, 1 day)': lambda db: os.remove(db.export_data('alerts', now - timedelta(days=1), now))
+    }
+
+def build_synthetic_database(db_path, rows=1000000, devices=200, days=30, seed=42):
+    """
+    Crée une base synthétique: données réseau, anomalies (10 % actives), alertes et journaux
+
+    Returns:
+        Identifiant d'un appareil présent dans les données
+    """
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp.now()
+    device_ids = np.array([f"device_{i:04d}" for i in range(devices)])
+
+    with DatabaseManager(db_path) as db:
+        for start in range(0, rows, 200000):
+            size = min(200000, rows - start)
+            picks = rng.integers(0, devices, size)
+            db.bulk_insert_network_data(pd.DataFrame({
+                'timestamp': now - pd.to_timedelta(rng.integers(0, days * 86400, size), unit='s'),
+                'device_id': device_ids[picks],
+                'ip_address': [f"10.0.{i // 256}.{i % 256}" for i in picks],
+                'port': rng.choice([22, 53, 80, 443, 3389, 8080], size),
+                'protocol': rng.choice(['TCP', 'UDP'], size),
+                'data_volume_mb': rng.exponential(2.0, size).round(3),
+                'connection_duration': rng.integers(0, 600, size),
+                'is_anomaly': rng.random(size) < 0.02
+            }))
+
+        anomalies = max(rows // 5, 1)
+        timestamps = now - pd.to_timedelta(rng.integers(0, days * 86400, anomalies), unit='s')
+        conn = db._get_connection()
+        with conn:
+            conn.executemany(db.INSERT_ANOMALY_SQL, zip(
+                timestamps.strftime(DatabaseManager.TIMESTAMP_FORMAT),
+                to_epoch_ms(pd.Series(timestamps)).tolist(),
+                device_ids[rng.integers(0, devices, anomalies)].tolist(),
+                ['behavioral'] * anomalies,
+                rng.choice(['Critique', 'Élevé', 'Moyen', 'Faible'], anomalies).tolist(),
+                rng.random(anomalies).round(3).tolist(),
+                [''] * anomalies
+            ))
+            conn.execute("UPDATE anomalies SET status = 'resolved' WHERE abs(random()) % 10 <> 0")
+            conn.execute('''
+                INSERT INTO alerts (timestamp, ts, alert_type, severity, title, description, device_id, status)
+                SELECT timestamp, ts, 'anomaly_detected', severity, 'Anomalie', description, device_id,
+                       CASE status WHEN 'active' THEN 'open' ELSE 'resolved' END
+                FROM anomalies WHERE id % 4 = 0
+            ''')
+        db.flush()
+        return str(device_ids[0])
+
+def capture_queries(db, workload):
+    """
+    Exécute le scénario et relève les SELECT émis sur la connexion de lecture
+
+    Returns:
+        Liste de (libellé, requête avec valeurs liées), sans doublons
+    """
+    conn = db._get_connection(read_only=True)
+    captured = []
+
+    for label, call in workload.items():
+        statements = []
+        conn.set_trace_callback(statements.append)
+        try:
+            call(db)
+        finally:
+            conn.set_trace_callback(None)
+        for sql in statements:
+            if sql.lstrip().upper().startswith('SELECT') and (label, sql) not in captured:
+                captured.append((label, sql))
+
+    return captured
+
+def explain(conn, sql):
+    """Plan de requête SQLite (EXPLAIN QUERY PLAN) en une ligne par étape"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+def time_query(conn, sql, repeat=5):
+    """Durée médiane d'exécution complète (ms), après une exécution de chauffe du cache"""
+    conn.execute(sql).fetchall()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+def _measure(conn, queries):
+    return [{'plan': explain(conn, sql), 'ms': time_query(conn, sql)} for _, sql in queries]
+
+def advise(db_path, apply=False, min_gain=0.2, workload=None, device_id='device_0000'):
+    """
+    Mesure le scénario avant et après création des index candidats
+
+    Args:
+        db_path: Base à analyser
+        apply: Conserver les index retenus (sinon ils sont supprimés après la mesure;
+               les candidats présents avant l'analyse sont toujours recréés)
+        min_gain: Gain relatif minimal sur au moins une requête pour retenir un index
+        workload: Scénario {libellé: appel}; par défaut default_workload()
+
+    Returns:
+        Tuple (DataFrame par requête: plans et durées avant/après, liste des index retenus)
+    """
+    workload = workload or default_workload(device_id)
+    conn = sqlite3.connect(db_path)
+
+    with DatabaseManager(db_path) as db:
+        queries = capture_queries(db, workload)
+
+    # Mesure de référence sans aucun candidat, y compris ceux déjà créés par
+    # init_database: ils sont recréés à la fin
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    present = [name for name in CANDIDATE_INDEXES if name in existing]
+    for name in present:
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("ANALYZE")
+    before = _measure(conn, queries)
+
+    # Chaque candidat seul: retenu s'il apparaît dans le plan d'une requête nettement accélérée
+    kept = []
+    for name in CANDIDATE_INDEXES:
+        conn.execute(CANDIDATE_INDEXES[name])
+        conn.execute("ANALYZE")
+        trial = _measure(conn, queries)
+        if any(any(name in step for step in t['plan']) and t['ms'] < b['ms'] * (1 - min_gain)
+               for b, t in zip(before, trial)):
+            kept.append(name)
+        conn.execute(f"DROP INDEX {name}")
+
+    # Mesure finale avec l'ensemble retenu
+    for name in kept:
+        conn.execute(CANDIDATE_INDEXES[name])
+    conn.execute("ANALYZE")
+    after = _measure(conn, queries)
+    if not apply:
+        for name in kept:
+            if name not in present:
+                conn.execute(f"DROP INDEX {name}")
+    for name in present:
+        conn.execute(CANDIDATE_INDEXES[name])
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    report = pd.DataFrame([{
+        'query': label,
+        'sql': ' '.join(sql.split())[:120],
+        'plan_before': ' | '.join(b['plan']),
+        'ms_before': round(b['ms'], 2),
+        'plan_after': ' | '.join(a['plan']),
+        'ms_after': round(a['ms'], 2),
+        'speedup': round(b['ms'] / a['ms'], 1) if a['ms'] > 0 else None
+    } for (label, sql), b, a in zip(queries, before, after)])
+    return report, kept
+
+def explain_analyze_postgresql(connection, sql, params=None):
+    """Plan exécuté d'une requête PostgreSQL (EXPLAIN (ANALYZE, BUFFERS)), en texte"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Conseiller d'index AEGISLAN (SQLite)")
+    parser.add_argument('--db', default='index_advisor.db', help="Base à analyser (créée si absente)")
+    parser.add_argument('--rows', type=int, default=1000000, help="Lignes network_data de la base synthétique")
+    parser.add_argument('--apply', action='store_true', help="Conserver les index retenus")
+    args = parser.parse_args()
+
+    device_id = 'device_0000'
+    if not os.path.exists(args.db):
+        print(f"Création de la base synthétique {args.db} ({args.rows:,} lignes)...")
+        device_id = build_synthetic_database(args.db, rows=args.rows)
+
+    report, kept = advise(args.db, apply=args.apply, device_id=device_id)
+    with pd.option_context('display.max_colwidth', 90, 'display.width', 200):
+        for _, row in report.iterrows():
+            print(f"\n{row['query']}: {row['ms_before']} ms -> {row['ms_after']} ms (x{row['speedup']})")
+            print(f"  avant: {row['plan_before']}")
+            print(f"  après: {row['plan_after']}")
+    print(f"\nIndex retenus: {', '.join(kept) or 'aucun'}" + (" (appliqués)" if args.apply and kept else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Journalisation système non bloquante pour AEGISLAN
+Les événements sont accumulés en mémoire et écrits par lots (taille ou délai) par un
+thread dédié, via le chemin d'insertion en masse du gestionnaire de base.
+"""
+
+import threading
+import time
+from collections import deque
+
+class BufferedLogSink:
+    """
+    Tampon borné d'événements system_logs vidé en arrière-plan
+
+    log() ne fait qu'ajouter une ligne en mémoire; quand le tampon est plein,
+    l'événement est abandonné et compté dans stats['dropped'] plutôt que de
+    bloquer l'appelant.
+    """
+
+    def __init__(self, write_batch, max_buffer=10000, batch_size=500, flush_interval=1.0, name="log-sink"):
+        """
+        Args:
+            write_batch: Fonction recevant une liste de lignes à écrire en une fois
+            max_buffer: Nombre maximal de lignes en attente
+            batch_size: Nombre de lignes déclenchant une écriture immédiate
+            flush_interval: Délai maximal (secondes) avant l'écriture d'une ligne
+        """
+        self.write_batch = write_batch
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {
+            'logged': 0,
+            'written': 0,
+            'dropped': 0,
+            'batches': 0,
+            'errors': 0,
+            'last_error': None
+        }
+        self._buffer = deque()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def log(self, row):
+        """Ajoute une ligne au tampon; retourne False si elle a été abandonnée"""
+        with self._condition:
+            if self._closed or len(self._buffer) >= self.max_buffer:
+                self.stats['dropped'] += 1
+                return False
+            self._buffer.append(row)
+            self.stats['logged'] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify_all()
+        return True
+
+    def flush(self, timeout=None):
+        """Attend que les lignes en tampon soient transmises à write_batch"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._buffer or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self):
+        """Écrit les lignes restantes puis arrête le thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._closed or self._flush_requested) and len(self._buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self.batch_size))]
+                self._in_flight = len(batch)
+                if not self._buffer:
+                    self._flush_requested = False
+                stopping = self._closed and not self._buffer
+
+            if batch:
+                try:
+                    self.write_batch(batch)
+                    self.stats['written'] += len(batch)
+                    self.stats['batches'] += 1
+                except Exception as e:
+                    # La journalisation ne doit jamais faire échouer l'application
+                    self.stats['errors'] += 1
+                    self.stats['dropped'] += len(batch)
+                    self.stats['last_error'] = str(e)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+            if stopping:
+                return
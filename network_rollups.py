@@ -0,0 +1,228 @@
+"""
+Agrégats pré-calculés (rollups) des données réseau AEGISLAN
+Chaque lot inséré est résumé par minute et par heure, par appareil, par port et
+par protocole. Les statistiques du tableau de bord sont ensuite lues dans ces
+tables, dont la taille ne dépend que du nombre de périodes et de clés.
+"""
+
+import zlib
+import numpy as np
+import pandas as pd
+
+MS_PER_MINUTE = 60 * 1000
+MS_PER_HOUR = 60 * MS_PER_MINUTE
+
+# Granularités maintenues: table et durée d'un intervalle
+ROLLUP_TABLES = {
+    'network_rollup_minute': MS_PER_MINUTE,
+    'network_rollup_hour': MS_PER_HOUR
+}
+
+# Dimensions d'agrégation: dimension -> colonne source de la clé
+DIMENSIONS = {
+    'device': 'device_id',
+    'port': 'port',
+    'protocol': 'protocol'
+}
+
+# Esquisse des ports distincts d'un appareil: bitmap de 1024 bits (comptage linéaire)
+SKETCH_BITS = 1024
+SKETCH_BYTES = SKETCH_BITS // 8
+
+# En deçà, un lot est agrégé ligne par ligne dans des dictionnaires: les passes
+# vectorisées ont un coût fixe qui dominerait pour les insertions unitaires du collecteur
+SMALL_BATCH_ROWS = 64
+
+def port_sketch_bits(ports):
+    """
+    Position dans l'esquisse de chaque port (finaliseur de MurmurHash3)
+
+    Le comptage linéaire suppose des positions pseudo-aléatoires: un hachage
+    multiplicatif simple répartit trop régulièrement les plages de ports consécutifs.
+    """
+    mask = np.uint64(0xFFFFFFFF)
+    h = np.asarray(ports, dtype=np.uint64) & mask
+    h ^= h >> np.uint64(16)
+    h = (h * np.uint64(0x85EBCA6B)) & mask
+    h ^= h >> np.uint64(13)
+    h = (h * np.uint64(0xC2B2AE35)) & mask
+    h ^= h >> np.uint64(16)
+    return h % np.uint64(SKETCH_BITS)
+
+def protocol_bit(protocol):
+    """Bit d'un protocole dans le masque 63 bits des protocoles distincts (hachage stable)"""
+    return 1 << (zlib.crc32(str(protocol).encode()) % 63)
+
+def sketch_or(left, right):
+    """Union de deux esquisses (fonction SQL sketch_or, utilisée lors des fusions)"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return (int.from_bytes(left, 'big') | int.from_bytes(right, 'big')).to_bytes(len(left), 'big')
+
+def estimate_distinct(sketch):
+    """Nombre estimé de valeurs distinctes d'une esquisse (comptage linéaire)"""
+    if not sketch:
+        return 0
+    set_bits = bin(int.from_bytes(sketch, 'big')).count('1')
+    empty = SKETCH_BITS - set_bits
+    if empty == 0:
+        return int(round(SKETCH_BITS * np.log(SKETCH_BITS)))
+    return int(round(-SKETCH_BITS * np.log(empty / SKETCH_BITS)))
+
+def _group_sketches(group_codes, ports, groups):
+    """Esquisse de ports de chaque groupe, en octets"""
+    bits = port_sketch_bits(ports).astype(np.int64)
+    sketches = np.zeros((groups, SKETCH_BYTES), dtype=np.uint8)
+    # Ordre gros-boutiste, cohérent avec int.from_bytes(..., 'big') de sketch_or
+    np.bitwise_or.at(sketches, (group_codes, SKETCH_BYTES - 1 - (bits >> 3)),
+                     (1 << (bits & 7)).astype(np.uint8))
+    return [row.tobytes() for row in sketches]
+
+def _group_protocol_masks(group_codes, protocols, groups):
+    """Masque des protocoles distincts de chaque groupe"""
+    codes, uniques = pd.factorize(protocols)
+    masks = np.array([protocol_bit(p) for p in uniques], dtype=np.int64)
+    result = np.zeros(groups, dtype=np.int64)
+    np.bitwise_or.at(result, group_codes, masks[codes])
+    return result.tolist()
+
+def _number(value, default):
+    """Valeur numérique d'un champ (default si absente ou illisible, comme pd.to_numeric)"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if number != number else number
+
+def _compute_small(frame):
+    """Agrégats d'un petit lot (SMALL_BATCH_ROWS lignes au plus), ligne par ligne"""
+    rows = zip(*(list(frame[column]) for column in
+                 ('ts', 'device_id', 'port', 'protocol', 'data_volume_mb', 'is_anomaly')))
+    records = []
+    for ts, device_id, port, protocol, volume, anomaly in rows:
+        ts = _number(ts, None)
+        if ts is None:
+            continue
+        if protocol is None or protocol != protocol:
+            protocol = 'unknown'
+        records.append((int(ts), str(device_id), int(_number(port, 0)), str(protocol),
+                        _number(volume, 0.0), int(_number(anomaly, 0))))
+
+    bits = port_sketch_bits([record[2] for record in records]).tolist() if records else []
+    rollups = {}
+    for table, bucket_ms in ROLLUP_TABLES.items():
+        groups = {}
+        for (ts, device_id, port, protocol, volume, anomaly), bit in zip(records, bits):
+            bucket_ts = ts // bucket_ms * bucket_ms
+            for dimension, key in (('device', device_id), ('port', str(port)), ('protocol', protocol)):
+                group = groups.get((bucket_ts, dimension, key))
+                if group is None:
+                    group = groups[(bucket_ts, dimension, key)] = [0, 0.0, volume, 0, 0, 0]
+                group[0] += 1
+                group[1] += volume
+                group[2] = max(group[2], volume)
+                group[3] += anomaly
+                if dimension == 'device':
+                    group[4] |= 1 << bit
+                    group[5] |= protocol_bit(protocol)
+
+        rollups[table] = [
+            (bucket_ts, dimension, key, connections, volume_sum, volume_max, anomaly_count,
+             sketch.to_bytes(SKETCH_BYTES, 'big') if dimension == 'device' else None,
+             protocols if dimension == 'device' else None)
+            for (bucket_ts, dimension, key), (connections, volume_sum, volume_max, anomaly_count, sketch, protocols)
+            in groups.items()
+        ]
+    return rollups
+
+def compute_rollups(frame):
+    """
+    Agrège un lot de données réseau pour chaque granularité et chaque dimension
+
+    Les clés de chaque dimension sont codées une seule fois; chaque granularité est
+    ensuite agrégée en une passe (un np.unique sur les codes dimension x intervalle x clé,
+    puis bincount). Les petits lots passent par des dictionnaires (_compute_small).
+
+    Args:
+        frame: DataFrame (ou dictionnaire de colonnes) avec ts (millisecondes epoch),
+               device_id, port, protocol, data_volume_mb et is_anomaly
+
+    Returns:
+        Dictionnaire {table: liste de tuples (bucket_ts, dimension, key, connections,
+        volume_sum, volume_max, anomaly_count, port_sketch, protocol_sketch)}
+    """
+    if len(frame['ts']) <= SMALL_BATCH_ROWS:
+        return _compute_small(frame)
+    frame = pd.DataFrame(frame) if not isinstance(frame, pd.DataFrame) else frame
+
+    ts = pd.to_numeric(frame['ts'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    valid = ~np.isnan(ts)
+    ts = ts[valid].astype(np.int64)
+    n = len(ts)
+    if n == 0:
+        return {table: [] for table in ROLLUP_TABLES}
+
+    columns = {
+        'device_id': frame['device_id'].astype(str).to_numpy()[valid],
+        'port': pd.to_numeric(frame['port'], errors='coerce').fillna(0).astype(np.int64).to_numpy()[valid],
+        'protocol': frame['protocol'].fillna('unknown').astype(str).to_numpy()[valid]
+    }
+    volume = pd.to_numeric(frame['data_volume_mb'], errors='coerce').fillna(0.0).to_numpy(dtype=float)[valid]
+    anomaly = pd.to_numeric(frame['is_anomaly'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)[valid]
+
+    # Codes des clés de chaque dimension (dans l'ordre de DIMENSIONS: device en premier)
+    key_codes = []
+    key_values = []
+    for column in DIMENSIONS.values():
+        codes, uniques = pd.factorize(columns[column])
+        key_codes.append(codes.astype(np.int64))
+        key_values.append(np.array([str(value) for value in uniques], dtype=object))
+    key_span = max(len(values) for values in key_values)
+    # Clé texte d'un groupe: position dans la concaténation des clés des dimensions
+    key_offsets = np.cumsum([0] + [len(values) for values in key_values[:-1]])
+    all_keys = np.concatenate(key_values)
+    dimension_names = np.array(list(DIMENSIONS), dtype=object)
+
+    rollups = {}
+    for table, bucket_ms in ROLLUP_TABLES.items():
+        buckets, bucket_codes = np.unique(ts // bucket_ms * bucket_ms, return_inverse=True)
+        cell_span = len(buckets) * key_span
+        # Code d'une ligne pour chaque dimension: dimension, puis intervalle, puis clé
+        combined = np.concatenate([dim * cell_span + bucket_codes * key_span + codes
+                                   for dim, codes in enumerate(key_codes)])
+        groups, group_codes = np.unique(combined, return_inverse=True)
+
+        entries = len(DIMENSIONS)
+        volumes = np.tile(volume, entries)
+        connections = np.bincount(group_codes, minlength=len(groups))
+        volume_sum = np.bincount(group_codes, weights=volumes, minlength=len(groups))
+        volume_max = np.full(len(groups), -np.inf)
+        np.maximum.at(volume_max, group_codes, volumes)
+        anomaly_count = np.bincount(group_codes, weights=np.tile(anomaly, entries),
+                                    minlength=len(groups)).astype(np.int64)
+
+        # Groupes triés par code: ceux de la dimension device viennent en premier
+        group_dims = groups // cell_span
+        device_groups = int(np.count_nonzero(group_dims == 0))
+        device_codes = group_codes[:n]
+        port_sketches = _group_sketches(device_codes, columns['port'], device_groups)
+        protocol_masks = _group_protocol_masks(device_codes, columns['protocol'], device_groups)
+        port_sketches += [None] * (len(groups) - device_groups)
+        protocol_masks += [None] * (len(groups) - device_groups)
+
+        cells = groups % cell_span
+        rollups[table] = list(zip(
+            buckets[cells // key_span].tolist(),
+            dimension_names[group_dims].tolist(),
+            all_keys[key_offsets[group_dims] + cells % key_span].tolist(),
+            connections.tolist(),
+            volume_sum.tolist(),
+            volume_max.tolist(),
+            anomaly_count.tolist(),
+            port_sketches,
+            protocol_masks
+        ))
+
+    return rollups
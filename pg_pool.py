@@ -0,0 +1,133 @@
+"""
+Pool de connexions PostgreSQL pour AEGISLAN
+Chaque opération emprunte une connexion (autocommit) le temps d'un bloc with, au lieu
+de partager une connexion unique entre le collecteur et les sessions Streamlit. Les
+connexions inactives depuis un moment sont vérifiées avant d'être prêtées, et une
+connexion perdue (serveur redémarré, réseau coupé) est remplacée par une neuve.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+# Erreurs signalant une connexion inutilisable: elle est fermée au lieu d'être rendue
+DISCONNECT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+class _SessionPool(ThreadedConnectionPool):
+    """ThreadedConnectionPool dont les connexions sont ouvertes en autocommit (et en lecture seule si demandé)"""
+
+    def __init__(self, minconn, maxconn, dsn, readonly=False):
+        self.readonly = readonly
+        super().__init__(minconn, maxconn, dsn)
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        conn.set_session(readonly=self.readonly, autocommit=True)
+        return conn
+
+class PostgreSQLPool:
+    """
+    Pool borné de connexions PostgreSQL, sûr entre threads
+
+    ThreadedConnectionPool lève PoolError dès qu'il est épuisé: un sémaphore de
+    max_size places fait attendre l'emprunteur (au plus timeout secondes) à la place.
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, readonly=False, timeout=30, health_check_interval=30):
+        """
+        Args:
+            dsn: URL de connexion
+            min_size: Connexions ouvertes dès la création et gardées ouvertes
+            max_size: Connexions simultanées au plus
+            readonly: Sessions en lecture seule (connexions de lecture)
+            timeout: Attente maximale (secondes) d'une connexion libre
+            health_check_interval: Inactivité (secondes) au-delà de laquelle une connexion
+                                   est vérifiée (SELECT 1) avant d'être prêtée
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.stats = {
+            'checkouts': 0,
+            'health_checks': 0,
+            'reconnects': 0,
+            'errors': 0,
+            'last_error': None
+        }
+        self._pool = _SessionPool(min_size, max_size, dsn, readonly)
+        self._slots = threading.BoundedSemaphore(max_size)
+        # Dernière restitution de chaque connexion (monotonic), par id de connexion
+        self._last_used = {}
+
+    @contextmanager
+    def connection(self):
+        """
+        Emprunte une connexion le temps du bloc with
+
+        Raises:
+            PoolError: si aucune connexion ne s'est libérée en timeout secondes
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"Aucune connexion PostgreSQL libre après {self.timeout}s")
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
+            except DISCONNECT_ERRORS as e:
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                self._discard(conn)
+                raise
+            except BaseException:
+                self._release(conn)
+                raise
+            else:
+                self._release(conn)
+        finally:
+            self._slots.release()
+
+    def _checkout(self):
+        """Connexion saine du pool; les connexions fermées ou sans réponse sont remplacées"""
+        for _ in range(self.max_size):
+            conn = self._pool.getconn()
+            if self._healthy(conn):
+                self.stats['checkouts'] += 1
+                return conn
+            self._discard(conn)
+        # Toutes les connexions inactives étaient perdues: une connexion neuve
+        # (une erreur ici signale que le serveur est injoignable)
+        conn = self._pool.getconn()
+        self.stats['checkouts'] += 1
+        return conn
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        self.stats['health_checks'] += 1
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            return True
+        except DISCONNECT_ERRORS:
+            return False
+
+    def _release(self, conn):
+        self._last_used[id(conn)] = time.monotonic()
+        self._pool.putconn(conn, close=bool(conn.closed))
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self.stats['reconnects'] += 1
+        self._pool.putconn(conn, close=True)
+
+    def close(self):
+        self._pool.closeall()
@@ -30,6 +30,9 @@ class ProductionConfig:
         # Configuration base de données
         self.DATABASE_PATH = config.get('database_path', 'data/aegislan_production.db')
         self.DB_BACKUP_INTERVAL = config.get('db_backup_interval', 3600)  # 1 heure
+        self.DB_BACKUP_DIR = config.get('db_backup_dir', 'backups/')
+        self.DB_BACKUP_KEEP = config.get('db_backup_keep', 24)  # Instantanés conservés
+        self.DB_BACKUP_COMPRESS = config.get('db_backup_compress', True)
         self.DATA_RETENTION_DAYS = config.get('data_retention_days', 30)
         
         # Configuration IA
@@ -81,6 +84,9 @@ class ProductionConfig:
             "continuous_monitoring": True,
             "database_path": "data/aegislan_production.db",
             "db_backup_interval": 3600,
+            "db_backup_dir": "backups/",
+            "db_backup_keep": 24,
+            "db_backup_compress": True,
             "data_retention_days": 30,
             "ai_model_path": "models/",
             "contamination_rate": 0.1,
@@ -145,6 +151,9 @@ class ProductionConfig:
         return {
             'database_path': self.DATABASE_PATH,
             'backup_interval': self.DB_BACKUP_INTERVAL,
+            'backup_dir': self.DB_BACKUP_DIR,
+            'backup_keep': self.DB_BACKUP_KEEP,
+            'backup_compress': self.DB_BACKUP_COMPRESS,
             'retention_days': self.DATA_RETENTION_DAYS
         }
     
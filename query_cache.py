@@ -0,0 +1,102 @@
+"""
+Cache des résultats de lecture AEGISLAN, invalidé par les écritures
+Chaque table a un compteur de version incrémenté après chaque écriture validée;
+la clé d'un résultat contient les versions des tables lues, un résultat devient
+donc inaccessible dès qu'une de ses tables change. La clé contient aussi la minute
+courante: les fenêtres relatives («dernières 24 h») glissent au plus d'une minute,
+et les écritures d'autres processus sont visibles au plus une minute plus tard.
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+class QueryCache:
+    """Cache LRU borné de résultats de requêtes, indexé par versions de tables"""
+
+    def __init__(self, max_entries=256, bucket_ms=60000):
+        """
+        Args:
+            max_entries: Nombre maximal de résultats conservés
+            bucket_ms: Durée pendant laquelle un résultat reste valide sans écriture
+        """
+        self.max_entries = max_entries
+        self.bucket_ms = bucket_ms
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0
+        }
+        self._versions = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, *tables):
+        """Incrémente la version des tables modifiées"""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_compute(self, name, arguments, tables, compute):
+        """
+        Retourne le résultat en cache de name(arguments), ou le calcule et le conserve
+
+        La clé est construite avant le calcul: une écriture validée pendant la requête
+        change les versions, et le résultat éventuellement périmé est rangé sous
+        l'ancienne clé, que plus aucune lecture n'atteindra.
+        """
+        with self._lock:
+            key = (name, arguments, tuple(self._versions.get(table, 0) for table in tables),
+                   int(time.time() * 1000) // self.bucket_ms)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return _copy(self._entries[key])
+            self.stats['misses'] += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return _copy(value)
+
+def _copy(value):
+    """Copie rendue à l'appelant: il peut modifier le résultat sans altérer le cache"""
+    if isinstance(value, pd.DataFrame):
+        result = value.copy()
+        result.attrs = dict(value.attrs)
+        return result
+    return copy.deepcopy(value)
+
+def cached_read(*tables):
+    """
+    Met en cache une méthode de lecture d'un gestionnaire disposant de query_cache
+
+    Args:
+        tables: Tables lues par la méthode (leurs versions entrent dans la clé)
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'query_cache', None)
+            arguments = (args, tuple(sorted(kwargs.items())))
+            try:
+                hash(arguments)
+            except TypeError:
+                cache = None
+            if cache is None:
+                return method(self, *args, **kwargs)
+            return cache.get_or_compute(method.__name__, arguments, tables,
+                                        lambda: method(self, *args, **kwargs))
+        return wrapper
+    return decorator
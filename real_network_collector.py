@@ -9,6 +9,8 @@ import psutil
 import time
 import threading
 from database_manager import DatabaseManager
+from production_config import config as production_config
+from baseline_enricher import DeviceBaselineEnricher
 
 # Gérer l'import optionnel de pysnmp au niveau du module
 try:
@@ -23,11 +25,22 @@ except ImportError:
 class RealNetworkCollector:
     """Collecteur de données réseau réelles pour AEGISLAN"""
     
-    def __init__(self, network_range="192.168.1.0/24", db_manager=None):
+    def __init__(self, network_range="192.168.1.0/24", db_manager=None, config=None):
         self.network_range = network_range
-        self.db_manager = db_manager or DatabaseManager()
+        # Le collecteur écrit depuis son propre thread: écritures regroupées par la file unique
+        self._owns_db_manager = db_manager is None
+        self.db_manager = db_manager or DatabaseManager(use_write_queue=True)
+        if self._owns_db_manager:
+            # Sauvegardes périodiques réglées par la configuration de production (db_backup_*),
+            # partagées par les collecteurs de toutes les sessions
+            self.db_manager.start_backup_schedule(config=config or production_config)
         self.is_monitoring = False
         self.monitoring_thread = None
+        # Toutes les frames de données réseau produites par le collecteur sont enrichies
+        # (scan, connexions, journaux, SNMP); le verrou protège l'état partagé entre le
+        # thread de surveillance et les appels de l'interface
+        self.baseline_enricher = DeviceBaselineEnricher()
+        self._enricher_lock = threading.Lock()
         
     def scan_network_nmap(self, ports="1-1000"):
         """Scan réseau avec Nmap"""
@@ -77,11 +90,23 @@ class RealNetworkCollector:
                     'data_volume_mb': 0,
                     'is_anomaly': False
                 })
-            return pd.DataFrame(devices)
+            return self.enrich_network_data(pd.DataFrame(devices))
         except ET.ParseError as e:
             self.db_manager.log_system_event("ERROR", "NetworkCollector", f"Nmap XML parsing failed: {e}")
             return pd.DataFrame()
     
+    def enrich_network_data(self, df):
+        """
+        Ajoute les features de référence par appareil attendues par le détecteur
+        
+        Appliqué une seule fois à chaque frame produite par le collecteur: l'historique
+        des appareils est incrémental, une ligne enrichie deux fois y compterait double.
+        """
+        if df.empty:
+            return df
+        with self._enricher_lock:
+            return self.baseline_enricher.enrich(df)
+    
     def _detect_device_type(self, mac_address):
         """Détecte le type d'appareil basé sur l'adresse MAC"""
         # Prefixes OUI courants
@@ -159,7 +184,7 @@ class RealNetworkCollector:
                         'is_anomaly': False
                     })
             
-            return pd.DataFrame(connections_data)
+            return self.enrich_network_data(pd.DataFrame(connections_data))
             
         except Exception as e:
             self.db_manager.log_system_event("ERROR", "NetworkCollector", f"Connections collection error: {str(e)}")
@@ -217,7 +242,7 @@ class RealNetworkCollector:
                     except (ValueError, IndexError):
                         continue
             
-            return pd.DataFrame(log_data)
+            return self.enrich_network_data(pd.DataFrame(log_data))
             
         except Exception as e:
             self.db_manager.log_system_event("ERROR", "NetworkCollector", f"Log parsing error: {str(e)}")
@@ -259,7 +284,7 @@ class RealNetworkCollector:
                         'is_anomaly': False
                     })
             
-            return pd.DataFrame(snmp_data)
+            return self.enrich_network_data(pd.DataFrame(snmp_data))
 
         except Exception as e:
             self.db_manager.log_system_event("ERROR", "NetworkCollector", f"SNMP collection error: {str(e)}")
@@ -282,6 +307,13 @@ class RealNetworkCollector:
         
         self.db_manager.log_system_event("INFO", "NetworkCollector", "Continuous monitoring stopped")
     
+    def close(self):
+        """Arrête la surveillance et ferme le gestionnaire créé par le collecteur (sauvegardes, écritures en file)"""
+        # Pas d'attente du thread de surveillance (démon, éventuellement en pause pour tout un intervalle)
+        self.is_monitoring = False
+        if self._owns_db_manager:
+            self.db_manager.close()
+    
     def _monitoring_loop(self, interval):
         """Boucle de surveillance continue"""
         while self.is_monitoring:
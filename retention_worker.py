@@ -0,0 +1,113 @@
+"""
+Purge de rétention progressive pour AEGISLAN (SQLite et PostgreSQL)
+Les lignes expirées sont supprimées par petites plages de clé primaire, avec un
+plafond de lignes par seconde: chaque transaction reste courte et la collecte
+n'attend jamais derrière un DELETE massif. La position atteinte dans chaque table
+est enregistrée dans maintenance_state, un redémarrage reprend où la purge s'était
+arrêtée.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+class RetentionWorker:
+    """
+    Purge continue des données plus anciennes que days jours
+
+    Le gestionnaire de base fournit retention_tables(cutoff), purge_batch(table,
+    cutoff, after_id, batch_rows), get/set_maintenance_state et, s'il existe,
+    reclaim_space(pages) appelé à la fin de chaque passe.
+    """
+
+    def __init__(self, manager, days=30, batch_rows=2000, max_rows_per_second=5000, interval=300,
+                 vacuum_pages=1000, name="retention"):
+        """
+        Args:
+            manager: DatabaseManager ou PostgreSQLManager
+            days: Durée de rétention
+            batch_rows: Taille (en identifiants) d'une plage supprimée par transaction
+            max_rows_per_second: Plafond de suppression (None: sans limite, par lots quand même)
+            interval: Délai (secondes) entre deux passes
+            vacuum_pages: Pages libres rendues au système à la fin d'une passe (SQLite)
+        """
+        self.manager = manager
+        self.days = days
+        self.batch_rows = batch_rows
+        self.max_rows_per_second = max_rows_per_second
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.stats = {
+            'passes': 0,
+            'batches': 0,
+            'deleted': 0,
+            'errors': 0,
+            'last_pass': None,
+            'last_error': None
+        }
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Arrête la purge après le lot en cours"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def run_once(self):
+        """
+        Effectue une passe complète sur toutes les tables
+
+        Returns:
+            Dictionnaire {table: lignes supprimées}
+        """
+        cutoff = int(time.time() * 1000) - int(self.days * 86400000)
+        started = time.perf_counter()
+        deleted = {}
+
+        for table in self.manager.retention_tables(cutoff):
+            state = f"retention:{table}"
+            after_id = self.manager.get_maintenance_state(state, 0)
+            deleted[table] = 0
+
+            while not self._stop.is_set():
+                batch_started = time.perf_counter()
+                count, after_id = self.manager.purge_batch(table, cutoff, after_id, self.batch_rows)
+                # Plus de ligne expirée au-delà: passe terminée, la suivante repart du début
+                self.manager.set_maintenance_state(state, after_id or 0)
+                if after_id is None:
+                    break
+
+                deleted[table] += count
+                self.stats['batches'] += 1
+                self.stats['deleted'] += count
+                if self.max_rows_per_second and count:
+                    pause = count / self.max_rows_per_second - (time.perf_counter() - batch_started)
+                    if pause > 0:
+                        self._stop.wait(pause)
+
+        reclaim_space = getattr(self.manager, 'reclaim_space', None)
+        if reclaim_space is not None and not self._stop.is_set():
+            reclaim_space(self.vacuum_pages)
+
+        self.stats['passes'] += 1
+        self.stats['last_pass'] = {
+            'finished_at': datetime.now().isoformat(),
+            'seconds': round(time.perf_counter() - started, 3),
+            'deleted': deleted
+        }
+        return deleted
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                # Une passe échouée est retentée à l'intervalle suivant
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+            self._stop.wait(self.interval)
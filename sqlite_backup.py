@@ -0,0 +1,220 @@
+"""
+Sauvegarde à chaud de la base SQLite AEGISLAN
+La copie passe par l'API de sauvegarde incrémentale de SQLite (Connection.backup):
+quelques pages à la fois, avec une pause entre deux étapes, pendant que la collecte
+continue d'écrire. Les instantanés sont horodatés, éventuellement compressés, et
+seuls les plus récents sont conservés.
+"""
+
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+def backup_database(db_path, destination, pages=256, sleep=0.01, compress=False):
+    """
+    Copie une base SQLite en cours d'utilisation vers un fichier
+
+    Une transaction de lecture est tenue pendant toute la copie: en WAL, l'instantané
+    copié est cohérent et les écritures concurrentes ne font pas recommencer la
+    sauvegarde (sans elle, chaque écriture d'une autre connexion la relance).
+
+    Args:
+        db_path: Base à sauvegarder
+        destination: Fichier de sortie (l'extension .gz est ajoutée si compress)
+        pages: Nombre de pages copiées par étape
+        sleep: Pause (secondes) après chaque étape, laissée aux écrivains; c'est aussi
+            le délai avant de retenter une étape refusée (base occupée ou verrouillée)
+        compress: Compression gzip de l'instantané
+
+    Returns:
+        Dictionnaire avec le chemin, le nombre de pages et d'étapes, les octets copiés,
+        la taille du fichier, la durée et le débit (octets par seconde)
+    """
+    if compress and not str(destination).endswith('.gz'):
+        destination = f"{destination}.gz"
+    # La copie est écrite à côté puis renommée: un instantané visible est toujours complet
+    partial = f"{destination[:-3] if compress else destination}.partial"
+
+    started = time.perf_counter()
+    steps = [0]
+
+    def progress(status, remaining, total):
+        steps[0] += 1
+        # Connection.backup n'attend sleep que sur SQLITE_BUSY/LOCKED: la pause
+        # entre deux étapes réussies est prise ici
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    source = sqlite3.connect(db_path, check_same_thread=False)
+    target = sqlite3.connect(partial)
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=pages, progress=progress, sleep=sleep)
+        page_size = target.execute("PRAGMA page_size").fetchone()[0]
+        page_count = target.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        source.rollback()
+        source.close()
+        target.close()
+
+    if compress:
+        with open(partial, 'rb') as f_in, gzip.open(f"{destination}.partial", 'wb', compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        os.remove(partial)
+        partial = f"{destination}.partial"
+    os.replace(partial, destination)
+
+    seconds = time.perf_counter() - started
+    copied = page_size * page_count
+    return {
+        'path': destination,
+        'pages': page_count,
+        'steps': steps[0],
+        'bytes': copied,
+        'file_bytes': os.path.getsize(destination),
+        'seconds': round(seconds, 3),
+        'bytes_per_second': int(copied / seconds) if seconds > 0 else None
+    }
+
+def rotate_backups(directory, prefix, keep):
+    """Supprime les instantanés les plus anciens de prefix au-delà de keep; retourne les fichiers supprimés"""
+    snapshots = sorted(glob.glob(os.path.join(directory, f"{prefix}_*.db")) +
+                       glob.glob(os.path.join(directory, f"{prefix}_*.db.gz")))
+    expired = snapshots[:-keep] if keep > 0 else []
+    for path in expired:
+        os.remove(path)
+    return expired
+
+class BackupScheduler:
+    """
+    Sauvegarde périodique d'une base SQLite dans un thread dédié
+
+    Chaque instantané est nommé <base>_AAAAMMJJ_HHMMSS.db[.gz]; les métriques des
+    sauvegardes sont conservées dans stats et transmises à on_backup.
+
+    for_database() partage un planificateur par fichier de base entre tous les
+    gestionnaires du processus (une session Streamlit chacun): une seule série
+    d'instantanés, arrêtée quand le dernier utilisateur le libère.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path, directory="backups", interval=3600, keep=24, compress=True,
+                 pages=256, sleep=0.01, on_backup=None, name="sqlite-backup"):
+        """
+        Args:
+            db_path: Base à sauvegarder
+            directory: Répertoire des instantanés
+            interval: Délai (secondes) entre deux sauvegardes
+            keep: Nombre d'instantanés conservés
+            compress: Compression gzip des instantanés
+            pages, sleep: Pages par étape et pause après chaque étape (voir backup_database)
+            on_backup: Fonction appelée avec les métriques de chaque sauvegarde réussie
+        """
+        self.db_path = db_path
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self.compress = compress
+        self.pages = pages
+        self.sleep = sleep
+        # Seul le plus ancien abonné encore inscrit reçoit les métriques (une trace par sauvegarde)
+        self._listeners = [on_backup] if on_backup else []
+        self._users = 0
+        self.prefix = os.path.splitext(os.path.basename(db_path))[0]
+        self.stats = {
+            'backups': 0,
+            'errors': 0,
+            'last_backup': None,
+            'last_error': None
+        }
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    @classmethod
+    def for_database(cls, db_path, on_backup=None, **options):
+        """
+        Retourne le planificateur partagé (démarré) d'un fichier de base, en le créant si besoin
+
+        Les réglages sont ceux du premier appel; chaque appel doit être suivi d'un release().
+        """
+        key = os.path.abspath(db_path)
+        with cls._instances_lock:
+            scheduler = cls._instances.get(key)
+            if scheduler is None or not scheduler.is_running():
+                scheduler = cls(db_path, **options).start()
+                cls._instances[key] = scheduler
+            scheduler._users += 1
+            if on_backup:
+                scheduler._listeners.append(on_backup)
+            return scheduler
+
+    @classmethod
+    def from_config(cls, config, db_path=None, **options):
+        """
+        Planificateur partagé réglé par ProductionConfig (intervalle, répertoire, rotation)
+
+        db_path remplace le chemin de la configuration (base réellement ouverte par le
+        gestionnaire). Retourne None si l'intervalle configuré est nul.
+        """
+        database = config.get_database_config()
+        if not database['backup_interval'] or database['backup_interval'] <= 0:
+            return None
+        return cls.for_database(db_path or database['database_path'], directory=database['backup_dir'],
+                                interval=database['backup_interval'], keep=database['backup_keep'],
+                                compress=database['backup_compress'], **options)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def release(self, on_backup=None):
+        """Libère une référence prise par for_database(); la dernière arrête le planificateur"""
+        with self._instances_lock:
+            if on_backup in self._listeners:
+                self._listeners.remove(on_backup)
+            self._users -= 1
+            if self._users > 0:
+                return
+            if self._instances.get(os.path.abspath(self.db_path)) is self:
+                del self._instances[os.path.abspath(self.db_path)]
+        self.stop()
+
+    def stop(self, timeout=None):
+        """Arrête le planificateur (une sauvegarde en cours se termine)"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def backup_now(self):
+        """Effectue une sauvegarde et la rotation; retourne les métriques"""
+        os.makedirs(self.directory, exist_ok=True)
+        destination = os.path.join(self.directory, f"{self.prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+        metrics = backup_database(self.db_path, destination, pages=self.pages, sleep=self.sleep,
+                                  compress=self.compress)
+        metrics['rotated'] = len(rotate_backups(self.directory, self.prefix, self.keep))
+
+        self.stats['backups'] += 1
+        self.stats['last_backup'] = metrics
+        for on_backup in self._listeners[:1]:
+            on_backup(metrics)
+        return metrics
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.backup_now()
+            except Exception as e:
+                # Une sauvegarde échouée est retentée à l'intervalle suivant
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
@@ -0,0 +1,93 @@
+"""
+Destinations d'écriture directe pour le simulateur AEGISLAN
+Chaque sink reçoit les blocs produits par NetworkDataSimulator.iter_network_chunks
+et les écrit par le chemin d'insertion en masse du backend, sans passer par un
+DataFrame complet en mémoire.
+"""
+
+import os
+import pandas as pd
+
+from columnar_store import write_columns
+
+# Colonnes de la table network_data PostgreSQL alimentées par le simulateur
+POSTGRESQL_COLUMNS = ['timestamp', 'device_id', 'ip_address', 'mac_address', 'port', 'protocol',
+                      'device_type', 'data_volume_mb', 'connection_duration', 'bytes_sent', 'bytes_received']
+
+class SQLiteSink:
+    """Écrit les blocs simulés dans SQLite via l'insertion en masse de DatabaseManager"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def write(self, chunk):
+        # La projection sur le schéma de network_data est faite par le gestionnaire
+        self.db_manager.bulk_insert_network_data(chunk)
+
+    def close(self):
+        pass
+
+class PostgreSQLSink:
+    """Écrit les blocs simulés dans PostgreSQL via PostgreSQLManager"""
+
+    def __init__(self, pg_manager):
+        self.pg_manager = pg_manager
+
+    def write(self, chunk):
+        frame = chunk.reindex(columns=POSTGRESQL_COLUMNS)
+        frame['connection_duration'] = None
+        frame['bytes_sent'] = 0
+        frame['bytes_received'] = 0
+        self.pg_manager.insert_network_data(frame)
+
+    def close(self):
+        pass
+
+class ColumnarFileSink:
+    """Écrit les blocs simulés dans des fichiers colonnaires part-NNNNN.npz"""
+
+    def __init__(self, directory, rows_per_file=1_000_000, compress=False):
+        self.directory = directory
+        self.rows_per_file = rows_per_file
+        self.compress = compress
+        self.pending = []
+        self.pending_rows = 0
+        self.files = []
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, chunk):
+        self.pending.append(chunk)
+        self.pending_rows += len(chunk)
+        if self.pending_rows >= self.rows_per_file:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        path = os.path.join(self.directory, f"part-{len(self.files):05d}.npz")
+        self.files.append(write_columns(path, pd.concat(self.pending, ignore_index=True), compress=self.compress))
+        self.pending = []
+        self.pending_rows = 0
+
+    def close(self):
+        self._flush()
+
+def create_sink(db_manager=None, directory=None, **options):
+    """
+    Crée le sink adapté au backend configuré
+
+    Args:
+        db_manager: DatabaseManager ou PostgreSQLManager (ex: issu de create_database_manager)
+        directory: Répertoire de sortie pour des fichiers colonnaires, si pas de base
+        **options: Options du ColumnarFileSink
+
+    Returns:
+        Sink exposant write(chunk) et close()
+    """
+    if directory:
+        return ColumnarFileSink(directory, **options)
+    if db_manager is None:
+        raise ValueError("Un gestionnaire de base ou un répertoire de sortie est requis")
+    if type(db_manager).__name__ == 'PostgreSQLManager':
+        return PostgreSQLSink(db_manager)
+    return SQLiteSink(db_manager)